@@ -1,14 +1,30 @@
-from typing import Protocol, Dict, Any, List
+from typing import Protocol, Dict, Any, List, Optional
+from app.card_index import CardIndex
+from app.card_schema import CardSchema
+from app.catalog_db import CatalogDatabase
+from app.image_prefetcher import ImagePrefetcher
+from app.owned_index import OwnedIndex
+from app.search_engine import SearchEngine
+from app.search_scheduler import SearchScheduler
 
 class ICardApp(Protocol):
     """Interface for CardApp functionality needed by UIComponents"""
     def display_card_info(self, card: Dict[str, Any]) -> None: ...
     def save_collection(self) -> None: ...
+    def set_owned_quantity(self, card_key: str, qty: int) -> None: ...
     
     @property
     def cards(self) -> List[Dict[str, Any]]: ...
     @cards.setter
     def cards(self, value: List[Dict[str, Any]]) -> None: ...
+
+    card_index: CardIndex
+    card_schema: CardSchema
+    search_engine: SearchEngine
+    owned_index: OwnedIndex
+    search_scheduler: SearchScheduler
+    image_prefetcher: ImagePrefetcher
+    catalog_db: Optional[CatalogDatabase]
     
     @property
     def collection(self) -> Dict[str, Any]: ...
@@ -1,26 +1,78 @@
 from PIL import Image
 from pathlib import Path
 from typing import *
+from collections import OrderedDict
+from collections.abc import Mapping
 import requests
 import io
+import threading
+
+from app.config import CONFIG
+
+
+class ImageLRU:
+    """Decoded images bounded by their total pixel memory, least recently used evicted first"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._images: "OrderedDict[Hashable, Image.Image]" = OrderedDict()
+        self._lock = threading.Lock()  # filled by the prefetch workers, read on the Tk thread
+
+    @staticmethod
+    def _cost(image: Image.Image) -> int:
+        return image.width * image.height * len(image.getbands())
+
+    def get(self, key: Hashable) -> Optional[Image.Image]:
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def put(self, key: Hashable, image: Image.Image) -> None:
+        with self._lock:
+            if key in self._images:
+                self.size_bytes -= self._cost(self._images.pop(key))
+            self._images[key] = image
+            self.size_bytes += self._cost(image)
+            while self.size_bytes > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self.size_bytes -= self._cost(evicted)
+
+    def __len__(self) -> int:
+        return len(self._images)
+
 
 class ImageManager:
     def __init__(self, image_folder: str):
         self.image_folder = Path(image_folder)
         if not (self.image_folder.exists() and self.image_folder.is_dir()):
             self.image_folder.mkdir(parents=True)
+        self.resized = ImageLRU(CONFIG["images"]["cache_bytes"])
+
+    def get_image(self, image_key: str, download_url: str, size: Tuple[int, int] = None,
+                  session: requests.Session = None) -> Optional[Image.Image]:
+        """Open the image, downloading it first (through session, if given) if needed.
 
-    def get_image(self, image_key: str, download_url: str) -> Optional[Image.Image]:
+        With a size, JPEGs are scaled down while decoding, so only as much resolution as size
+        needs is decoded. Other formats, including the PNG art the card CDN serves, are decoded
+        in full and then reduced by a whole factor, so the caller's resize has fewer pixels to
+        filter. The result is never smaller than size, so callers still resize to the exact
+        dimensions. See benchmarks/image_decode.py.
+        """
         image_path = self.image_folder.joinpath(image_key)
         
         # If image doesn't exist, try to download it
         if not image_path.exists():
             try:
-                response = requests.get(download_url, stream=True)
+                response = (session or requests).get(download_url, timeout=CONFIG["images"]["timeout"])
                 if response.status_code == 200:
-                    # Save the image file
-                    with open(image_path, 'wb') as out_file:
+                    # Save the image file; another thread may be reading the same path
+                    tmp_path = _tmp_path(image_path)
+                    with open(tmp_path, 'wb') as out_file:
                         out_file.write(response.content)
+                    tmp_path.replace(image_path)
                 else:
                     print(f"Failed to download image: {download_url}")
                     return None
@@ -30,30 +82,215 @@ class ImageManager:
         
         try:
             # Open and return the image
-            return Image.open(str(image_path))
+            image = Image.open(str(image_path))
+            if size is not None:
+                image = self._decode_reduced(image, size)
+            return image
         except Exception as e:
             print(f"Error opening image {image_path}: {e}")
             return None
 
-class Card:
-    def __init__(self, card_data, image_manager: ImageManager):
-        self.card_data = card_data
-        self.image_manager = image_manager
-
-    def __str__(self):
-        return f"{self.name} ({self.set_code})"
-    
-    def name(self) -> str:
-        return self.card_data.get("Name", "Unknown Card")
-    
-    def uid(self) -> str:
-        return self.card_data.get("card_key", "Unknown card_key")
-
-    def get_image(self, back: bool = False) -> Optional[Image.Image]:
-        image_key = f"{self.uid()}_{'back' if back else 'front'}.jpg"
-        image_url = self.card_data.get("BackArtUri" if back else "ArtUri", "")
-        
-        return self.image_manager.get_image(
-            image_key=image_key,
-            download_url=image_url
-        )
\ No newline at end of file
+    @staticmethod
+    def _decode_reduced(image: Image.Image, size: Tuple[int, int]) -> Image.Image:
+        if image.draft("RGB", size) is not None:
+            return image  # the JPEG decoder picked a scale of 1/2, 1/4 or 1/8
+        # No reduced decode (PNG): load in full, but hand the resize fewer pixels
+        factor = min(image.width // size[0], image.height // size[1])
+        if factor < 2:
+            return image
+        with image:
+            return image.reduce(factor)
+
+    def cached_card_image(self, card_key: str, face: str, size: Tuple[int, int]) -> Optional[Image.Image]:
+        """The image get_card_image would return, if it is already in memory"""
+        return self.resized.get((card_key, face, size))
+
+    def get_card_image(self, card_key: str, face: str, size: Tuple[int, int],
+                       download_url: str = None, session: requests.Session = None) -> Optional[Image.Image]:
+        """The card's front or back art at size, decoded once and then served from memory.
+
+        Sizes are read from the derivatives written next to the art on its first use; the
+        full-resolution file is only decoded to produce them. Without a download_url, art
+        that isn't on disk yet is reported as missing.
+        """
+        key = (card_key, face, size)
+        image = self.resized.get(key)
+        if image is not None:
+            return image
+
+        derived_path = self._derived_path(card_key, face, size)
+        if not derived_path.exists():
+            image_key = f"{card_key}_{face}.jpg"
+            if not download_url and not self.image_folder.joinpath(image_key).exists():
+                return None
+            # Decode for the largest size of the pyramid, whichever way the art is oriented
+            side = max(max(size), *(max(s) for s in CONFIG["images"]["sizes"].values()))
+            original = self.get_image(image_key, download_url or "", (side, side), session)
+            if original is None:
+                return None
+            with original:
+                self._write_derivatives(card_key, face, original, size)
+
+        try:
+            with Image.open(derived_path) as derived:
+                image = derived.convert("RGB")
+        except Exception as e:
+            print(f"Error opening image {derived_path}: {e}")
+            return None
+        self.resized.put(key, image)
+        return image
+
+    def _derived_path(self, card_key: str, face: str, size: Tuple[int, int]) -> Path:
+        return self.image_folder.joinpath(CONFIG["images"]["derived_folder"],
+                                          f"{card_key}_{face}_{size[0]}x{size[1]}.jpg")
+
+    def _write_derivatives(self, card_key: str, face: str, original: Image.Image,
+                           requested: Tuple[int, int]) -> None:
+        # The whole pyramid, oriented like the art (Leader and Base fronts are landscape),
+        # plus the requested size should it be an odd one out
+        landscape = original.width > original.height
+        sizes = [(h, w) if landscape else (w, h) for w, h in CONFIG["images"]["sizes"].values()]
+        if requested not in sizes:
+            sizes.append(requested)
+
+        source = original.convert("RGB")
+        for size in sorted(sizes, reverse=True):
+            path = self._derived_path(card_key, face, size)
+            if path.exists():
+                continue
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = _tmp_path(path)
+            source.resize(size, Image.Resampling.LANCZOS).save(
+                tmp_path, "JPEG", quality=CONFIG["images"]["jpeg_quality"])
+            tmp_path.replace(path)
+
+def _tmp_path(path: Path) -> Path:
+    # Per thread, so two workers producing the same file don't write into each other
+    return path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+
+
+CARD_FIELDS = (
+    "card_key", "Set", "Number", "Name", "Subtitle", "Type", "Aspects", "Traits", "Arenas", "Keywords",
+    "Cost", "Power", "HP", "FrontText", "BackText", "EpicAction", "DoubleSided", "Rarity", "Unique",
+    "Artist", "VariantType", "MarketPrice", "FoilPrice", "LowPrice", "LowFoilPrice", "FrontArt", "BackArt",
+)
+# Long fields only the detail window and full-text indexing read; a catalog file keeps them on disk
+COLD_FIELDS = ("FrontText", "BackText", "EpicAction", "FrontArt", "BackArt")
+HOT_FIELDS = tuple(f for f in CARD_FIELDS if f not in COLD_FIELDS)
+_FIELD_SET = frozenset(CARD_FIELDS)
+_COLD_SET = frozenset(COLD_FIELDS)
+
+
+class Card(Mapping):
+    """Read-only card record with one slot per known field.
+
+    Behaves like the card dicts it replaces (card["Name"], card.get("Cost", ""), "Aspects" in
+    card, dict(card)), but a missing field costs one empty slot instead of a hash entry.
+    Fields the schema doesn't know yet are kept in a small overflow dict. Cards read from a
+    catalog file leave the cold fields unset and decode them from the file on access.
+    """
+    __slots__ = CARD_FIELDS + ("_extra", "_store", "_row")
+
+    def __init__(self, data: Mapping):
+        extra = None
+        for field, value in data.items():
+            if field in _FIELD_SET:
+                object.__setattr__(self, field, value)
+            else:
+                extra = extra or {}
+                extra[field] = value
+        object.__setattr__(self, "_extra", extra)
+        object.__setattr__(self, "_store", None)
+        object.__setattr__(self, "_row", 0)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Card records are read-only")
+
+    __delattr__ = __setattr__
+
+    def __getitem__(self, field: str) -> Any:
+        value = self.get(field, MISSING)
+        if value is MISSING:
+            raise KeyError(field)
+        return value
+
+    def get(self, field: str, default: Any = None) -> Any:
+        if field in _FIELD_SET:
+            value = getattr(self, field, MISSING)
+            if value is not MISSING:
+                return value
+            if self._store is not None and field in _COLD_SET:
+                return self._store.read(self._row, field, default)
+            return default
+        return self._extra.get(field, default) if self._extra else default
+
+    def __contains__(self, field) -> bool:
+        if field in _FIELD_SET:
+            if hasattr(self, field):
+                return True
+            return self._store is not None and field in _COLD_SET and self._store.has(self._row, field)
+        return bool(self._extra) and field in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        # __contains__ inlined: catalog-wide passes (CardSchema) iterate every card
+        store, row = self._store, self._row
+        for field in CARD_FIELDS:
+            if hasattr(self, field) or (store is not None and field in _COLD_SET and store.has(row, field)):
+                yield field
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"Card({dict(self)!r})"
+
+    def __str__(self) -> str:
+        return f"{self.get('Name', 'Unknown Card')} ({self.get('Set', '')})"
+
+
+MISSING = object()
+
+
+# Slot descriptors set values directly, bypassing the read-only __setattr__
+_SLOT_SETTERS = {field: getattr(Card, field).__set__ for field in CARD_FIELDS}
+_set_extra = Card._extra.__set__
+_set_store = Card._store.__set__
+_set_row = Card._row.__set__
+
+
+def card_from_values(fields: Sequence[str], values: Sequence[Any], extra: Dict[str, Any] = None,
+                     store=None, row: int = 0) -> Card:
+    """Build a Card from parallel field/value sequences; MISSING values leave the slot unset.
+
+    store, when given, supplies the cold fields through store.read(row, field, default) and
+    store.has(row, field).
+    """
+    card = Card.__new__(Card)
+    for field, value in zip(fields, values):
+        if value is not MISSING:
+            _SLOT_SETTERS[field](card, value)
+    _set_extra(card, extra)
+    _set_store(card, store)
+    _set_row(card, row)
+    return card
+
+
+def build_cards(cards: Iterable[Mapping]) -> List[Card]:
+    """Turn normalized card dicts into Card records sharing one copy of each repeated value.
+
+    Variants of a card repeat the same rules text, traits and art credits, so equal strings
+    and tuples are collapsed to a single object across the whole catalog.
+    """
+    shared: Dict[Any, Any] = {}
+    records = []
+    for card in cards:
+        if isinstance(card, Card):
+            records.append(card)
+            continue
+        records.append(Card({
+            field: shared.setdefault(value, value) if isinstance(value, (str, tuple)) else value
+            for field, value in card.items()
+        }))
+    return records
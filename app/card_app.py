@@ -1,18 +1,24 @@
 from typing import *  # noqa: F403
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import ttk, messagebox
 import os
-import json
-import time
-import requests
+import queue
 import logging
 
 from app.config import CONFIG
-from app.data_manager import load_cards, load_collection, save_collection
+from app.data_manager import load_cards, save_card_sets, open_catalog_db, ingest_catalog_db
 from app.validators import CardValidator
 from app.card_detail_window import CardDetailWindow
 from app.ui_components import UIComponents
 from app.card import ImageManager
+from app.image_prefetcher import ImagePrefetcher
+from app.card_index import CardIndex
+from app.card_schema import CardSchema
+from app.owned_index import OwnedIndex
+from app.search_engine import SearchEngine
+from app.search_scheduler import SearchScheduler
+from app.card_updater import CardDataUpdater
+from app.collection_store import CollectionStore
 from app.app_interfaces import ICardApp
 
 
@@ -21,20 +27,29 @@ class CardApp(ICardApp):
         self.root = root
         self.root.title(CONFIG["window"]["title"])
         self.image_manager = ImageManager(CONFIG["data"]["image_folder"])
+        self.image_prefetcher = ImagePrefetcher(self.root, self.image_manager)
         
         # Dynamic window size
         self.setup_window()
         
         # Initialize private attributes for properties
         self._cards = []
-        self._collection = {}
+        self.card_index = CardIndex()
+        self.card_schema = CardSchema()
+        self.search_engine = SearchEngine()
+        self.owned_index = OwnedIndex()
+        self.collection_store = None
         
         # Load data
-        self._cards = load_cards()
-        self._collection = load_collection()
+        self.cards = load_cards()
+        self.collection_store = CollectionStore(self.root, on_flush=self._mirror_collection)
+        self.owned_index.rebuild(self.search_engine, self.collection)
+        self.catalog_db = open_catalog_db(self._cards, self.collection)
         os.makedirs(CONFIG["data"]["image_folder"], exist_ok=True)
 
         self.default_sets = CONFIG["default_sets"]
+        self.card_updater = None
+        self.search_scheduler = SearchScheduler(self.root)
 
         # Initialize UI
         self.ui = UIComponents(self)
@@ -49,14 +64,19 @@ class CardApp(ICardApp):
     @cards.setter
     def cards(self, value: List[Dict[str, Any]]) -> None:
         self._cards = value
+        self.card_index.rebuild(value)
+        self.card_schema.rebuild(value)
+        self.search_engine.rebuild(value)
+        if self.collection_store is not None:
+            self.owned_index.rebuild(self.search_engine, self.collection)
     
     @property
     def collection(self) -> Dict[str, Any]:
-        return self._collection
+        return self.collection_store.data
     
     @collection.setter
     def collection(self, value: Dict[str, Any]) -> None:
-        self._collection = value
+        self.collection_store.data = value
 
     def setup_window(self):
         screen_width = self.root.winfo_screenwidth()
@@ -70,18 +90,34 @@ class CardApp(ICardApp):
         font_cfg = CONFIG["window"]["font"]
         self.root.option_add("*Font", f"{font_cfg['family']} {font_cfg['size']}")
 
+    def set_owned_quantity(self, card_key: str, qty: int) -> None:
+        old_qty = self.collection_store.get(card_key)
+        self.collection_store.set(card_key, qty)
+        self.owned_index.update(card_key, old_qty, qty)
+        self.ui.on_owned_changed(card_key, old_qty, qty)
+
     def save_collection(self):
-        save_collection(self.collection)
+        self.collection_store.flush()
+
+    def _mirror_collection(self, changed):
+        if self.catalog_db:
+            self.catalog_db.save_collection(changed)
 
     def on_exit(self):
         if messagebox.askyesno("Exit", "Are you sure you want to exit?"):
             self.save_collection()
+            self.search_scheduler.shutdown()
+            self.image_prefetcher.shutdown()
             self.root.destroy()
 
     def display_card_info(self, card):
         CardDetailWindow(self.root, self, card)
 
     def update_card_data(self):
+        if self.card_updater:
+            messagebox.showinfo("Update in Progress", "A card data update is already running.")
+            return
+
         sets:str = self.get_set_codes_dialog(self.default_sets)
 
         valid, message = CardValidator.validate_set_codes(sets)
@@ -89,79 +125,95 @@ class CardApp(ICardApp):
             messagebox.showerror("Validation Error", message)
             return
 
-        all_cards = []
-        api_config = CONFIG["api"]
-        progress_window = None
-
+        updater = CardDataUpdater(sets)
+        self.card_updater = updater
+
+        progress_window = tk.Toplevel(self.root)
+        progress_window.title("Updating Card Data")
+        progress_window.geometry("300x170")
+        progress_window.transient(self.root)
+        progress_window.grab_set()
+
+        progress_label = tk.Label(progress_window, text="Fetching card data...")
+        progress_label.pack(pady=10)
+        progress_bar = ttk.Progressbar(progress_window, mode='determinate')
+        progress_bar.pack(fill='x', padx=20, pady=10)
+        progress_bar['maximum'] = len(sets)
+        status_label = tk.Label(progress_window, text="")
+        status_label.pack(pady=5)
+
+        def cancel():
+            updater.cancel()
+            self.card_updater = None
+            progress_window.destroy()
+
+        tk.Button(progress_window, text="Cancel", command=cancel, width=12).pack(pady=5)
+        progress_window.protocol("WM_DELETE_WINDOW", cancel)
+
+        def poll_updater():
+            # Worker threads never touch Tk; drain their events here on the main loop
+            if updater.cancelled:
+                return
+            while True:
+                try:
+                    event = updater.events.get_nowait()
+                except queue.Empty:
+                    break
+
+                kind = event[0]
+                if kind == "started":
+                    status_label.config(text=f"Processing set: {event[1]}")
+                elif kind == "retry":
+                    status_label.config(text=f"Retrying {event[1]} (attempt {event[2]})")
+                elif kind == "progress":
+                    progress_bar['value'] = event[2]
+                    status_label.config(text=f"Finished set: {event[1]}")
+                elif kind in ("done", "error"):
+                    self.card_updater = None
+                    progress_window.destroy()
+                    if kind == "done":
+                        self.apply_card_data(event[1], updater.resumed_sets)
+                    else:
+                        messagebox.showerror(
+                            "Error",
+                            f"{event[1]}\n\nSets that finished downloading were saved; "
+                            f"the next update will resume from them."
+                        )
+                    return
+            self.root.after(100, poll_updater)
+
+        updater.start()
+        self.root.after(100, poll_updater)
+
+    def apply_card_data(self, set_results, resumed_sets=()):
         try:
-            progress_window = tk.Toplevel(self.root)
-            progress_window.title("Updating Card Data")
-            progress_window.geometry("300x150")
-            progress_window.transient(self.root)
-            progress_window.grab_set()
-
-            progress_label = tk.Label(progress_window, text="Fetching card data...")
-            progress_label.pack(pady=10)
-            progress_bar = tk.ttk.Progressbar(progress_window, mode='determinate')
-            progress_bar.pack(fill='x', padx=20, pady=10)
-            progress_bar['maximum'] = len(sets)
-            status_label = tk.Label(progress_window, text="")
-            status_label.pack(pady=5)
-
-            for index, set_code in enumerate(sets):
-                status_label.config(text=f"Processing set: {set_code}")
-                progress_bar['value'] = index
-                progress_window.update()
-
-                url = f"{api_config['base_url']}/cards/{set_code}?format=json"
-                response_data = None
-
-                for attempt in range(api_config["retry_attempts"]):
-                    try:
-                        response = requests.get(url, headers=api_config["headers"], timeout=api_config["timeout"])
-                        response.raise_for_status()
-                        response_data = response.json()
-                        break
-                    except requests.exceptions.RequestException as e:
-                        if attempt < api_config["retry_attempts"] - 1:
-                            time.sleep(2 ** attempt)
-                            status_label.config(text=f"Retrying {set_code} (attempt {attempt + 2})")
-                            progress_window.update()
-                        else:
-                            raise ConnectionError(f"Failed to fetch data for {set_code}: {e}")
-
-                if "data" in response_data:
-                    set_cards:List[Dict[str:Any]] = response_data["data"]
-                    normalized_cards = []
-                    for card in set_cards:
-                        valid, error_message = CardValidator.validate_card_data(card)
-                        if not valid:
-                            logging.warning(f"Skipping invalid card in {set_code}: {error_message}")
-                            continue
-
-                        # Add internal key without discarding other data
-                        card_key = f"{card.get('Set', '')}-{card.get('Number', '')}-{card.get('VariantType', 'Normal')}"
-                        card["card_key"] = card_key
-                        normalized_cards.append(card)
-
-                    all_cards.extend(normalized_cards)
-            if not all_cards:
+            if not any(result["cards"] for result in set_results):
                 raise ValueError("No valid cards were found")
 
-            with open(CONFIG["data"]["cards_file"], 'w', encoding='utf-8') as f:
-                json.dump(all_cards, f, indent=2, ensure_ascii=False)
+            all_cards = save_card_sets(set_results)
+            if self.catalog_db:
+                ingest_catalog_db(self.catalog_db, all_cards)
 
             self.cards = all_cards
             self.ui.cards = all_cards
+            # Searches still under way index into the old catalog
+            for key in ("all", "owned", "deck"):
+                self.search_scheduler.cancel(key)
             self.ui.load_table()
             self.ui.load_table(owned_only=True)
-            messagebox.showinfo("Success", f"Card data updated successfully.\nTotal cards: {len(all_cards)}")
+            changed = [result["set_code"] for result in set_results if result["changed"]]
+            # Sets checkpointed by an interrupted update were not downloaded again
+            resumed = f"Resumed from an earlier update: {', '.join(resumed_sets)}\n" if resumed_sets else ""
+            messagebox.showinfo(
+                "Success",
+                f"Card data updated successfully.\n"
+                f"Changed sets: {', '.join(changed) if changed else 'none'}\n"
+                f"{resumed}"
+                f"Total cards: {len(all_cards)}"
+            )
         except Exception as e:
             logging.error("Failed to update card data", exc_info=True)
             messagebox.showerror("Error", str(e))
-        finally:
-            if progress_window:
-                progress_window.destroy()
 
     def get_set_codes_dialog(self, default_sets):
         dialog = tk.Toplevel(self.root)
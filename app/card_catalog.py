@@ -0,0 +1,158 @@
+from typing import *
+from array import array
+import mmap
+import os
+import pickle
+import struct
+import sys
+
+from app.card import COLD_FIELDS, HOT_FIELDS, MISSING, Card, card_from_values
+
+MAGIC = b"SWUCAT01"
+_PREFIX = struct.Struct("<8sI")  # magic, header length
+_NO_VALUE = 0xFFFFFFFF
+
+
+class CatalogCards(list):
+    """Cards read from a catalog file, with the field statistics recorded when it was written
+    (see CardSchema), so they needn't be recounted over every card on each start."""
+
+    def __init__(self, cards: Iterable[Card], field_types: Dict[str, str], field_counts: Dict[str, int]):
+        super().__init__(cards)
+        self.field_types = field_types
+        self.field_counts = field_counts
+
+
+class ColdStore:
+    """Reads cold card fields out of a memory-mapped catalog file.
+
+    The offset table holds an (offset, length) pair per card and cold field into the text
+    blob; a field is decoded each time it is read, so nothing of it stays resident.
+    """
+
+    def __init__(self, mapping: mmap.mmap, offsets: memoryview, blob_start: int, fields: Sequence[str]):
+        self._mapping = mapping
+        self._offsets = offsets
+        self._blob_start = blob_start
+        self._width = len(fields)
+        self._columns = {field: i for i, field in enumerate(fields)}
+
+    def _slot(self, row: int, field: str) -> int:
+        return 2 * (row * self._width + self._columns[field])
+
+    def has(self, row: int, field: str) -> bool:
+        return self._offsets[self._slot(row, field)] != _NO_VALUE
+
+    def read(self, row: int, field: str, default: Any = None) -> Any:
+        slot = self._slot(row, field)
+        offset = self._offsets[slot]
+        if offset == _NO_VALUE:
+            return default
+        start = self._blob_start + offset
+        return self._mapping[start:start + self._offsets[slot + 1]].decode("utf-8")
+
+
+def write_catalog(path: str, meta: Dict[str, Any], cards: Sequence[Mapping]) -> None:
+    """Write cards as a catalog file: header, value tables, fixed-width hot records, cold
+    offsets and the text blob.
+
+    Each hot record is one uint32 per HOT_FIELDS entry indexing a table of distinct values,
+    so repeated strings and tuples are stored once. Cold fields are UTF-8 in the blob.
+    """
+    values: List[Any] = [None]  # id 0 marks a missing field
+    value_ids: Dict[Tuple[type, Any], int] = {}
+    hot = array("I")
+    cold = array("I")
+    blob = bytearray()
+    extras = {}
+    field_types: Dict[str, str] = {}
+    field_counts: Dict[str, int] = {}
+    for row, card in enumerate(cards):
+        for field in HOT_FIELDS:
+            value = card.get(field, MISSING)
+            if value is MISSING:
+                hot.append(0)
+                continue
+            field_counts[field] = field_counts.get(field, 0) + 1
+            field_types.setdefault(field, type(value).__name__)
+            key = (type(value), value)  # keeps 1, 1.0 and True apart
+            if key not in value_ids:
+                value_ids[key] = len(values)
+                values.append(value)
+            hot.append(value_ids[key])
+        for field in COLD_FIELDS:
+            value = card.get(field)
+            if value is None:
+                cold.extend((_NO_VALUE, 0))
+                continue
+            field_counts[field] = field_counts.get(field, 0) + 1
+            field_types.setdefault(field, "str")
+            data = str(value).encode("utf-8")
+            cold.extend((len(blob), len(data)))
+            blob += data
+        extra = {k: v for k, v in card.items() if k not in HOT_FIELDS and k not in COLD_FIELDS}
+        if extra:
+            extras[row] = extra
+            for field, value in extra.items():
+                field_counts[field] = field_counts.get(field, 0) + 1
+                field_types.setdefault(field, type(value).__name__)
+
+    tables = pickle.dumps({"values": values, "extras": extras, "field_types": field_types,
+                           "field_counts": field_counts}, protocol=pickle.HIGHEST_PROTOCOL)
+    header = pickle.dumps({
+        **meta,
+        "byteorder": sys.byteorder,
+        "count": len(cards),
+        "hot_fields": HOT_FIELDS,
+        "cold_fields": COLD_FIELDS,
+        "tables_bytes": len(tables),
+        "hot_bytes": hot.itemsize * len(hot),
+        "cold_bytes": cold.itemsize * len(cold),
+        "blob_bytes": len(blob),
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(header)))
+        f.write(header)
+        f.write(tables)
+        hot.tofile(f)
+        cold.tofile(f)
+        f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_catalog(path: str, meta: Dict[str, Any]) -> Optional[CatalogCards]:
+    """Load the cards of a catalog file whose header matches meta, or None.
+
+    A file whose length disagrees with its header (cut short or half written) is None too, so
+    the caller rebuilds it. Hot fields are decoded into the returned Cards; cold fields stay in
+    the mapped file.
+    """
+    with open(path, "rb") as f:
+        magic, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            return None
+        # The small header is checked first, so a stale catalog is rejected after one short read
+        header = pickle.loads(f.read(header_len))
+        if any(header.get(k) != v for k, v in meta.items()) or header["byteorder"] != sys.byteorder \
+                or header["hot_fields"] != HOT_FIELDS or header["cold_fields"] != COLD_FIELDS:
+            return None
+        hot_start = _PREFIX.size + header_len + header["tables_bytes"]
+        cold_start = hot_start + header["hot_bytes"]
+        blob_start = cold_start + header["cold_bytes"]
+        if os.fstat(f.fileno()).st_size != blob_start + header["blob_bytes"]:
+            return None
+        tables = pickle.loads(f.read(header["tables_bytes"]))
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mapping)
+    hot = view[hot_start:cold_start].cast("I").tolist()
+    store = ColdStore(mapping, view[cold_start:blob_start].cast("I"), blob_start, COLD_FIELDS)
+
+    values, extras, width = tables["values"], tables["extras"], len(HOT_FIELDS)
+    values[0] = MISSING
+    return CatalogCards((
+        card_from_values(HOT_FIELDS, [values[i] for i in hot[row * width:(row + 1) * width]],
+                         extras.get(row), store, row)
+        for row in range(header["count"])
+    ), tables["field_types"], tables["field_counts"])
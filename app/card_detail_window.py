@@ -4,6 +4,7 @@ from PIL import Image, ImageTk
 import os
 import json
 from app.config import CONFIG
+from app.image_prefetcher import art_size
 from typing import Dict, Any
 
 class CardDetailWindow:
@@ -78,26 +79,7 @@ class CardDetailWindow:
         self.image_label = tk.Label(image_frame)
         self.image_label.pack(anchor="center")
 
-        card_key = self.card.get("card_key", "")
-        suffix = "back" if not self.is_front_image else "front"
-        image_path = os.path.join(CONFIG["data"]["image_folder"], f"{card_key}_{suffix}.jpg")
-        
-        try:
-            image_data = Image.open(image_path)
-            self.image_path = image_path
-            
-            card_type = self.card.get("Type", "").lower()
-            if not self.is_front_image or card_type not in ["leader", "base"]:
-                image_data = image_data.resize((375, 525), Image.Resampling.LANCZOS)
-            else:
-                image_data = image_data.resize((525, 375), Image.Resampling.LANCZOS)
-                
-            photo = ImageTk.PhotoImage(image_data)
-            self.image_label.configure(image=photo)
-            self.image_label.image = photo  # Keep reference to prevent garbage collection
-        except (FileNotFoundError, IOError):
-            print(f"Image not found: {image_path}")
-            self.image_label.configure(text="Image not found")
+        self._show_image()
 
         button_frame = tk.Frame(parent)
         button_frame.pack(pady=2)
@@ -111,9 +93,36 @@ class CardDetailWindow:
 
         button_frame.pack(anchor="center")
 
+    def _show_image(self):
+        card_key = self.card.get("card_key", "")
+        suffix = "back" if not self.is_front_image else "front"
+        self.image_path = os.path.join(CONFIG["data"]["image_folder"], f"{card_key}_{suffix}.jpg")
+
+        size = art_size(self.card, suffix, "detail")
+        prefetcher = self.card_app.image_prefetcher
+        art_url = self.card.get("BackArt" if suffix == "back" else "FrontArt", "")
+        image_data = prefetcher.get(card_key, suffix, size, art_url,
+                                    lambda image: self._image_loaded(suffix, image))
+        self._set_image(image_data)
+
+    def _image_loaded(self, suffix, image_data):
+        if not self.detail_window.winfo_exists() or suffix != ("front" if self.is_front_image else "back"):
+            return  # closed or flipped while downloading
+        if image_data is None:
+            print(f"Image not found: {self.image_path}")
+            self.image_label.configure(image="", text="Image not found")
+            self.image_label.image = None
+            return
+        self._set_image(image_data)
+
+    def _set_image(self, image_data):
+        photo = ImageTk.PhotoImage(image_data)
+        self.image_label.configure(image=photo, text="")
+        self.image_label.image = photo  # Keep reference to prevent garbage collection
+
     def flip_image(self):
         self.is_front_image = not self.is_front_image
-        self.add_image_section(self.scrollable_frame)  # Reload the image section
+        self._show_image()
 
     def open_full_art(self):
         try:
@@ -149,10 +158,7 @@ class CardDetailWindow:
 
         def update_owned(new_qty):
             owned_qty.set(new_qty)
-            self.card_app.collection[self.card["card_key"]] = new_qty
-            self.card_app.save_collection()
-            self.card_app.ui.load_table()
-            self.card_app.ui.load_table(owned_only=True)
+            self.card_app.set_owned_quantity(self.card["card_key"], new_qty)
 
         owned_frame = tk.Frame(parent)
         ttk.Separator(parent, orient='horizontal').pack(fill='x', pady=10)
@@ -166,8 +172,8 @@ class CardDetailWindow:
         # Card Stats
         stats_text = (
             f"Type: {self.card.get('Type', '')}\n"
-            f"Arenas: {self.card.get('Arenas', '')}\n"
-            f"Aspect: {self.card.get('Aspects', '')}\n"
+            f"Arenas: {', '.join(self.card.get('Arenas', ()))}\n"
+            f"Aspect: {', '.join(self.card.get('Aspects', ()))}\n"
             f"Cost: {self.card.get('Cost', '')}   Power: {self.card.get('Power', '')}   Health: {self.card.get('HP', '')}\n"
             f"Traits: {', '.join(self.card.get('Traits', []))}\n"
         )
@@ -263,5 +269,5 @@ class CardDetailWindow:
         # Display all raw card data
         raw_text = tk.Text(all_data_text_frame, wrap="word", height=15, font=("Courier", 9))
         raw_text.pack(fill="x", pady=5)
-        raw_text.insert("1.0", json.dumps(self.card, indent=2))
+        raw_text.insert("1.0", json.dumps(dict(self.card), indent=2))
         raw_text.config(state="disabled")
@@ -0,0 +1,37 @@
+from typing import *
+
+
+class CardIndex:
+    """Dictionary lookups over the loaded card catalog"""
+
+    def __init__(self, cards: List[Dict[str, Any]] = None):
+        self.rebuild(cards or [])
+
+    def rebuild(self, cards: List[Dict[str, Any]]) -> None:
+        self._by_key: Dict[str, Dict[str, Any]] = {}
+        self._by_set_number: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._by_type: Dict[str, List[Dict[str, Any]]] = {}
+
+        for card in cards:
+            self._by_key[card["card_key"]] = card
+            self._by_set_number[(card.get("Set", ""), card.get("Number", ""))] = card
+            self._by_type.setdefault(card.get("Type", ""), []).append(card)
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def __contains__(self, card_key: str) -> bool:
+        return card_key in self._by_key
+
+    def get(self, card_key: str, default: Any = None) -> Optional[Dict[str, Any]]:
+        return self._by_key.get(card_key, default)
+
+    def by_set_number(self, set_code: str, number: str) -> Optional[Dict[str, Any]]:
+        return self._by_set_number.get((set_code, number))
+
+    def by_type(self, card_type: str) -> List[Dict[str, Any]]:
+        return self._by_type.get(card_type, [])
+
+    def is_type(self, card_key: str, card_type: str) -> bool:
+        card = self._by_key.get(card_key)
+        return card is not None and card.get("Type") == card_type
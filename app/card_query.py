@@ -0,0 +1,183 @@
+from typing import *
+from bisect import bisect_left
+import operator
+import re
+
+from app.facet_index import FacetIndex, bits_from_indices, facet_values, iter_bits
+
+# query field -> card fields whose words it searches
+TEXT_FIELDS = {
+    "name": ("Name",),
+    "subtitle": ("Subtitle",),
+    "text": ("FrontText", "BackText"),
+    "trait": ("Traits",),
+    "keyword": ("Keywords",),
+}
+TEXT_FIELDS["any"] = tuple(f for fields in TEXT_FIELDS.values() for f in fields)
+
+FACET_ALIASES = {"set": "Set", "type": "Type", "aspect": "Aspects", "arena": "Arenas"}
+NUMERIC_FIELDS = {"cost": "Cost", "power": "Power", "hp": "HP"}
+FIELD_ALIASES = {"traits": "trait", "keywords": "keyword", "kw": "keyword", "aspects": "aspect",
+                 "arenas": "arena", "health": "hp"}
+
+COMPARISONS = {":": operator.eq, "=": operator.eq, "!=": operator.ne, "<": operator.lt,
+               "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+# After a field the value may be empty (still typing) but never starts with an operator
+# character, so "cost<=" can't be read as cost < "="
+_TERM = re.compile(r'(-?)(?:([a-z]+)(<=|>=|!=|[:=<>]))?("[^"]*"?|(?(2)(?![<>=!]))\S*)', re.IGNORECASE)
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+class QueryTerm(NamedTuple):
+    field: str  # key of TEXT_FIELDS, FACET_ALIASES or NUMERIC_FIELDS
+    op: str
+    value: str
+    negated: bool = False
+
+
+class ParsedQuery(NamedTuple):
+    text: str  # unfielded words, matched fuzzily against card names
+    terms: List[QueryTerm]
+
+
+def parse_query(query: str) -> ParsedQuery:
+    """Split a search box query into fuzzy name text and field terms.
+
+    trait:droid cost<=3 type:unit text:"heal 2" arena:ground -keyword:sentinel
+
+    A quoted phrase without a field searches every text field. Words with an unknown
+    field, or a comparison on a non-numeric field, are kept as name text. A known field
+    with no value yet ("cost<=", "trait:") is dropped, so it neither filters nor fuzzily
+    matches names while the value is being typed.
+    """
+    words, terms = [], []
+    for match in _TERM.finditer(query):
+        if not match.group(0):
+            continue  # the pattern can match nothing between words
+        negated, field, op, value = match.groups()
+        quoted = value.startswith('"')
+        value = value.strip('"')
+        if field:
+            field = FIELD_ALIASES.get(field.lower(), field.lower())
+            numeric = field in NUMERIC_FIELDS
+            known = field in TEXT_FIELDS or field in FACET_ALIASES or numeric
+            if known and not value:
+                continue
+            if known and (numeric or op in (":", "=")):
+                terms.append(QueryTerm(field, op, value, bool(negated)))
+                continue
+        if quoted:
+            terms.append(QueryTerm("any", ":", value, bool(negated)))
+        else:
+            words.append(match.group(0))
+    return ParsedQuery(" ".join(words), terms)
+
+
+class QueryIndex:
+    """Inverted index answering parsed query terms with bitsets over card positions.
+
+    Each text field maps its words to the cards containing them; a term matches words by
+    prefix so results narrow on every keystroke. Multi-word phrases are intersected word by
+    word and then checked for adjacency on the few remaining cards. Numeric fields keep one
+    bitset per distinct value, so a comparison ORs a handful of them.
+    """
+
+    def __init__(self, cards: List[Dict[str, Any]] = None, facets: FacetIndex = None):
+        self.rebuild(cards or [], facets)
+
+    def rebuild(self, cards: List[Dict[str, Any]], facets: FacetIndex = None) -> None:
+        self.size = len(cards)
+        self.all_bits = (1 << self.size) - 1
+        self.facets = facets or FacetIndex(cards)
+
+        self.cards = cards
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._vocabulary: Dict[str, List[str]] = {}
+        for field in {f for fields in TEXT_FIELDS.values() for f in fields}:
+            positions: Dict[str, List[int]] = {}
+            for i, card in enumerate(cards):
+                for word in set(self._card_words(card, field)):
+                    positions.setdefault(word, []).append(i)
+            self._postings[field] = {w: bits_from_indices(p, self.size) for w, p in positions.items()}
+            self._vocabulary[field] = sorted(positions)
+
+        self._numbers: Dict[str, Dict[float, int]] = {}
+        for field in NUMERIC_FIELDS.values():
+            positions = {}
+            for i, card in enumerate(cards):
+                try:
+                    positions.setdefault(float(card[field]), []).append(i)
+                except (KeyError, TypeError, ValueError):
+                    continue
+            self._numbers[field] = {n: bits_from_indices(p, self.size) for n, p in positions.items()}
+
+    def filter(self, terms: Iterable[QueryTerm]) -> int:
+        """Bitset of the cards matching every term"""
+        mask = self.all_bits
+        for term in terms:
+            bits = self._term_bits(term)
+            mask &= (self.all_bits & ~bits) if term.negated else bits
+            if not mask:
+                break
+        return mask
+
+    def _term_bits(self, term: QueryTerm) -> int:
+        if term.field in NUMERIC_FIELDS:
+            try:
+                number = float(term.value)
+            except ValueError:
+                return 0
+            compare = COMPARISONS[term.op]
+            bits = 0
+            for value, value_bits in self._numbers[NUMERIC_FIELDS[term.field]].items():
+                if compare(value, number):
+                    bits |= value_bits
+            return bits
+
+        if term.field in FACET_ALIASES:
+            prefix = term.value.lower()
+            bits = 0
+            for value, value_bits in self.facets.bits[FACET_ALIASES[term.field]].items():
+                if value.lower().startswith(prefix):
+                    bits |= value_bits
+            return bits
+
+        words = tokenize(term.value)
+        bits = 0
+        for field in TEXT_FIELDS[term.field]:
+            field_bits = self.all_bits
+            for word in words:
+                field_bits &= self._prefix_bits(field, word)
+            if len(words) > 1 and field_bits:
+                field_bits = self._adjacent(field, words, field_bits)
+            bits |= field_bits
+        return bits if words else self.all_bits
+
+    @staticmethod
+    def _card_words(card: Dict[str, Any], field: str) -> List[str]:
+        # Re-read from the card rather than kept, so long text stays in the catalog file
+        return tokenize(" ".join(facet_values(card, field)))
+
+    def _prefix_bits(self, field: str, prefix: str) -> int:
+        vocabulary, postings = self._vocabulary[field], self._postings[field]
+        bits = 0
+        for i in range(bisect_left(vocabulary, prefix), len(vocabulary)):
+            word = vocabulary[i]
+            if not word.startswith(prefix):
+                break
+            bits |= postings[word]
+        return bits
+
+    def _adjacent(self, field: str, phrase: List[str], candidates: int) -> int:
+        matched = []
+        n = len(phrase)
+        for i in iter_bits(candidates):
+            words = self._card_words(self.cards[i], field)
+            if any(all(words[s + j].startswith(phrase[j]) for j in range(n)) for s in range(len(words) - n + 1)):
+                matched.append(i)
+        return bits_from_indices(matched, self.size)
@@ -0,0 +1,103 @@
+from typing import *
+import logging
+import sys
+
+from app.card import COLD_FIELDS
+
+INT_FIELDS = ("Cost", "Power", "HP")
+FLOAT_FIELDS = ("MarketPrice", "FoilPrice", "LowPrice", "LowFoilPrice")
+TUPLE_FIELDS = ("Aspects", "Arenas", "Traits", "Keywords")
+# Small vocabularies repeated across thousands of cards; interning shares one string each
+ENUM_FIELDS = ("Set", "Type", "Rarity", "VariantType", "Artist")
+BOOL_FIELDS = ("Unique", "DoubleSided")
+
+
+def _to_number(value, kind):
+    if isinstance(value, kind) and not isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return kind(value)
+    value = str(value).strip()
+    if not value:
+        return None
+    return kind(float(value)) if kind is int else kind(value)
+
+
+def _to_tuple(value) -> Tuple[str, ...]:
+    if isinstance(value, (list, tuple)):
+        return tuple(sys.intern(str(v)) for v in value if v)
+    return tuple(sys.intern(v) for v in (value or "").split(", ") if v)
+
+
+def normalize_card(card: Dict[str, Any]) -> Dict[str, Any]:
+    """Return card with typed fields; safe to apply to an already normalized card.
+
+    Cost/Power/HP become ints and prices floats (empty or unparseable values are dropped so
+    lookups fall back to their defaults), list-like fields become tuples of interned strings,
+    and enum-like strings are interned.
+    """
+    card = dict(card)
+    for fields, kind in ((INT_FIELDS, int), (FLOAT_FIELDS, float)):
+        for field in fields:
+            if field not in card:
+                continue
+            try:
+                value = _to_number(card[field], kind)
+            except (TypeError, ValueError):
+                logging.debug(f"Dropping non-numeric {field} {card[field]!r} of {card.get('card_key')}")
+                value = None
+            if value is None:
+                del card[field]
+            else:
+                card[field] = value
+    for field in TUPLE_FIELDS:
+        if field in card:
+            card[field] = _to_tuple(card[field])
+    for field in ENUM_FIELDS:
+        if isinstance(card.get(field), str):
+            card[field] = sys.intern(card[field])
+    for field in BOOL_FIELDS:
+        if field in card:
+            card[field] = card[field] in (True, "true", "True", "1", 1)
+    if "card_key" in card:
+        card["card_key"] = sys.intern(card["card_key"])
+    return card
+
+
+def normalize_cards(cards: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [normalize_card(card) for card in cards]
+
+
+class CardSchema:
+    """Registry of the fields present in the catalog and the type each one holds.
+
+    Cards from a catalog file carry the statistics recorded when it was written. Otherwise
+    they are counted here; cold fields are always text, so their values are never read, which
+    on Cards would decode each of them from the mapped file.
+    """
+
+    def __init__(self, cards: List[Dict[str, Any]] = None):
+        self.rebuild(cards or [])
+
+    def rebuild(self, cards: List[Dict[str, Any]]) -> None:
+        if isinstance(getattr(cards, "field_counts", None), dict):
+            self.field_types, self.field_counts = dict(cards.field_types), dict(cards.field_counts)
+            return
+
+        self.field_types: Dict[str, str] = {}
+        self.field_counts: Dict[str, int] = {}
+        types, counts = self.field_types, self.field_counts
+        for card in cards:
+            for field in card:
+                if field in counts:
+                    counts[field] += 1
+                else:
+                    counts[field] = 1
+                    types[field] = "str" if field in COLD_FIELDS else type(card[field]).__name__
+
+    @property
+    def fields(self) -> List[str]:
+        return sorted(self.field_types)
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.field_types
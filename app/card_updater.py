@@ -0,0 +1,164 @@
+from typing import *
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import logging
+import queue
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.card_schema import normalize_card
+from app.config import CONFIG
+from app.data_manager import load_set_manifest, load_set_cards, load_checkpoints, write_checkpoint
+from app.validators import CardValidator
+
+
+class UpdateCancelled(Exception):
+    pass
+
+
+def create_session(pool_size: int) -> requests.Session:
+    session = requests.Session()
+    session.headers.update(CONFIG["api"]["headers"])
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def normalize_set_cards(set_code: str, response_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    normalized_cards = []
+    for card in response_data.get("data", []):
+        valid, error_message = CardValidator.validate_card_data(card)
+        if not valid:
+            logging.warning(f"Skipping invalid card in {set_code}: {error_message}")
+            continue
+
+        # Add internal key without discarding other data
+        card_key = f"{card.get('Set', '')}-{card.get('Number', '')}-{card.get('VariantType', 'Normal')}"
+        card["card_key"] = card_key
+        normalized_cards.append(normalize_card(card))
+    return normalized_cards
+
+
+class CardDataUpdater:
+    """Downloads card sets on a worker pool, reporting progress through a queue.
+
+    Events are tuples read by the Tk thread:
+    ("started", set_code), ("retry", set_code, attempt), ("progress", set_code, done_count),
+    ("done", set_results), ("error", exception), ("cancelled",)
+
+    Each set result is {"set_code", "cards", "changed", "etag", "last_modified", "sha256"}.
+    Sets the server reports as unchanged are served from the per-set store without re-parsing.
+    Every finished set is checkpointed immediately, and sets checkpointed by an earlier
+    interrupted run are resumed instead of downloaded again.
+    """
+
+    def __init__(self, set_codes: List[str]):
+        self.set_codes = list(set_codes)
+        self.manifest = load_set_manifest()
+        self.resumed_sets: List[str] = []
+        self.events: "queue.Queue[tuple]" = queue.Queue()
+        self.max_workers = max(1, min(CONFIG["api"]["max_workers"], len(self.set_codes)))
+        self._cancelled = False
+        self._stop_event = threading.Event()  # set on user cancel or after the first failed set
+        self._thread = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="card-data-update", daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        self._cancelled = True
+        self._stop_event.set()
+
+    def _run(self):
+        session = create_session(self.max_workers)
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="set-download")
+        try:
+            results = {}
+            checkpoints = load_checkpoints()
+            for set_code in self.set_codes:
+                if set_code in checkpoints:
+                    results[set_code] = checkpoints[set_code]
+                    self.resumed_sets.append(set_code)
+                    self.events.put(("progress", set_code, len(results)))
+
+            futures = {executor.submit(self._fetch_set, session, code): code for code in self.set_codes if code not in results}
+            for future in as_completed(futures):
+                set_code = futures[future]
+                results[set_code] = future.result()
+                self.events.put(("progress", set_code, len(results)))
+
+            # Keep the catalog in the order the sets were requested
+            self.events.put(("done", [results[code] for code in self.set_codes]))
+        except UpdateCancelled:
+            self.events.put(("cancelled",))
+        except Exception as e:
+            self._stop_event.set()
+            logging.error("Failed to update card data", exc_info=True)
+            # Sets still downloading finish and checkpoint first, so a retry resumes them instead
+            # of fetching them again and racing on their staging files
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.events.put(("error", e))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            session.close()
+
+    def _fetch_set(self, session: requests.Session, set_code: str) -> Dict[str, Any]:
+        api_config = CONFIG["api"]
+        url = f"{api_config['base_url']}/cards/{set_code}?format=json"
+        response = None
+
+        entry = self.manifest["sets"].get(set_code, {})
+        cached_cards = load_set_cards(set_code, self.manifest) if entry else None
+        headers = {}
+        if cached_cards is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        for attempt in range(api_config["retry_attempts"]):
+            if self._stop_event.is_set():
+                raise UpdateCancelled()
+            self.events.put(("started", set_code) if attempt == 0 else ("retry", set_code, attempt + 1))
+            try:
+                response = session.get(url, headers=headers, timeout=api_config["timeout"])
+                if response.status_code != 304:
+                    response.raise_for_status()
+                break
+            except requests.exceptions.RequestException as e:
+                if attempt >= api_config["retry_attempts"] - 1:
+                    raise ConnectionError(f"Failed to fetch data for {set_code}: {e}")
+                # Back off without blocking cancellation
+                if self._stop_event.wait(2 ** attempt):
+                    raise UpdateCancelled()
+
+        result = self._build_result(set_code, entry, response, cached_cards)
+        write_checkpoint(result)
+        return result
+
+    def _build_result(self, set_code, entry, response, cached_cards) -> Dict[str, Any]:
+        result = {
+            "set_code": set_code,
+            "etag": response.headers.get("ETag", entry.get("etag")),
+            "last_modified": response.headers.get("Last-Modified", entry.get("last_modified")),
+        }
+        if response.status_code == 304:
+            return {**result, "cards": cached_cards, "changed": False, "sha256": entry.get("sha256")}
+
+        # Servers without validators still resend identical bodies; the content hash catches those
+        digest = hashlib.sha256(response.content).hexdigest()
+        if cached_cards is not None and digest == entry.get("sha256"):
+            return {**result, "cards": cached_cards, "changed": False, "sha256": digest}
+
+        try:
+            response_data = response.json()
+        except ValueError as e:
+            raise ConnectionError(f"Invalid data received for {set_code}: {e}")
+        return {**result, "cards": normalize_set_cards(set_code, response_data), "changed": True, "sha256": digest}
@@ -0,0 +1,180 @@
+import json
+import sqlite3
+from typing import *
+
+FTS_COLUMNS = ("Name", "Subtitle", "FrontText", "BackText", "Traits", "Keywords")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS cards (
+    card_key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    set_code TEXT,
+    number TEXT,
+    type TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cards_set ON cards(set_code, number);
+CREATE INDEX IF NOT EXISTS idx_cards_type ON cards(type);
+CREATE TABLE IF NOT EXISTS card_aspects (
+    card_key TEXT NOT NULL,
+    aspect TEXT NOT NULL,
+    PRIMARY KEY (aspect, card_key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS card_arenas (
+    card_key TEXT NOT NULL,
+    arena TEXT NOT NULL,
+    PRIMARY KEY (arena, card_key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS collection (
+    card_key TEXT PRIMARY KEY,
+    qty INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_collection_owned ON collection(qty) WHERE qty > 0;
+CREATE TABLE IF NOT EXISTS deck_cards (
+    deck TEXT NOT NULL,
+    card_key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (deck, card_key)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS cards_fts USING fts5(
+    card_key UNINDEXED, Name, Subtitle, FrontText, BackText, Traits, Keywords
+);
+"""
+
+
+def _as_list(value) -> List[str]:
+    if isinstance(value, (list, tuple)):
+        return [v for v in value if v]
+    return [v for v in (value or "").split(", ") if v]
+
+
+def _fts_prefix_query(query: str) -> str:
+    # Quote each token so FTS5 operators typed by the user are treated as text
+    tokens = [t.replace('"', '""') for t in query.split()]
+    return " ".join(f'"{t}"*' for t in tokens if t)
+
+
+class CatalogDatabase:
+    """SQLite storage for cards, collection quantities and deck contents"""
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file)
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def ingest_cards(self, cards: List[Dict[str, Any]]) -> None:
+        with self.conn:
+            for table in ("cards", "card_aspects", "card_arenas", "cards_fts"):
+                self.conn.execute(f"DELETE FROM {table}")
+
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO cards (card_key, name, set_code, number, type, data) VALUES (?, ?, ?, ?, ?, ?)",
+                ((c["card_key"], c.get("Name", ""), c.get("Set", ""), c.get("Number", ""), c.get("Type", ""),
+                  json.dumps(dict(c), ensure_ascii=False)) for c in cards)
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO card_aspects (card_key, aspect) VALUES (?, ?)",
+                ((c["card_key"], a) for c in cards for a in _as_list(c.get("Aspects")))
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO card_arenas (card_key, arena) VALUES (?, ?)",
+                ((c["card_key"], a) for c in cards for a in _as_list(c.get("Arenas")))
+            )
+            self.conn.executemany(
+                f"INSERT INTO cards_fts (card_key, {', '.join(FTS_COLUMNS)}) VALUES (?{', ?' * len(FTS_COLUMNS)})",
+                ((c["card_key"], *(" ".join(_as_list(c.get(col))) for col in FTS_COLUMNS)) for c in cards)
+            )
+
+    def get_card(self, card_key: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT data FROM cards WHERE card_key = ?", (card_key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_collection(self, collection: Dict[str, int]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO collection (card_key, qty) VALUES (?, ?)",
+                collection.items()
+            )
+
+    def save_deck(self, deck: str, deck_cards: Dict[str, int]) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM deck_cards WHERE deck = ?", (deck,))
+            self.conn.executemany(
+                "INSERT INTO deck_cards (deck, card_key, count) VALUES (?, ?, ?)",
+                ((deck, k, n) for k, n in deck_cards.items())
+            )
+
+    def replace_decks(self, decks: Dict[str, Dict[str, int]]) -> None:
+        """Make deck_cards hold exactly decks ({"folder/name": {card_key: count}})"""
+        with self.conn:
+            self.conn.execute("DELETE FROM deck_cards")
+            self.conn.executemany(
+                "INSERT INTO deck_cards (deck, card_key, count) VALUES (?, ?, ?)",
+                ((deck, k, n) for deck, deck_cards in decks.items() for k, n in deck_cards.items())
+            )
+
+    def delete_deck(self, deck: str) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM deck_cards WHERE deck = ?", (deck,))
+
+    def rename_deck(self, old: str, new: str) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM deck_cards WHERE deck = ?", (new,))
+            self.conn.execute("UPDATE deck_cards SET deck = ? WHERE deck = ?", (new, old))
+
+    def rename_deck_folder(self, old: str, new: str) -> None:
+        prefix = f"{old}/"
+        with self.conn:
+            self.conn.execute(
+                "UPDATE deck_cards SET deck = ? || substr(deck, ?) WHERE substr(deck, 1, ?) = ?",
+                (f"{new}/", len(prefix) + 1, len(prefix), prefix)
+            )
+
+    def search(self, query: str = "", s_set: str = "All", s_type: str = "All", s_aspect: str = "All",
+               s_arena: str = "All", columns: Sequence[str] = ("Name",), limit: int = -1) -> List[str]:
+        """Return matching card keys, best full-text match first.
+
+        Owned filtering is left to the caller: the collection table is only mirrored when the
+        collection is flushed, so it can lag behind the latest edits.
+        """
+        sql = ["SELECT c.card_key FROM cards c"]
+        where, params = [], []
+
+        match = _fts_prefix_query(query)
+        if match:
+            sql.append("JOIN cards_fts f ON f.card_key = c.card_key")
+            where.append("cards_fts MATCH ?")
+            params.append(f"{{{' '.join(columns)}}} : ({match})")
+        if s_set != "All":
+            where.append("c.set_code = ?")
+            params.append(s_set)
+        if s_type != "All":
+            where.append("c.type = ?")
+            params.append(s_type)
+        if s_aspect != "All":
+            where.append("c.card_key IN (SELECT card_key FROM card_aspects WHERE aspect = ?)")
+            params.append(s_aspect)
+        if s_arena != "All":
+            where.append("c.card_key IN (SELECT card_key FROM card_arenas WHERE arena = ?)")
+            params.append(s_arena)
+
+        if where:
+            sql.append("WHERE " + " AND ".join(where))
+        sql.append("ORDER BY " + ("bm25(cards_fts), " if match else "") + "c.rowid LIMIT ?")
+        params.append(limit)
+        return [row[0] for row in self.conn.execute(" ".join(sql), params)]
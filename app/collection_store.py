@@ -0,0 +1,63 @@
+from typing import *
+import logging
+import time
+
+from app.config import CONFIG
+from app.data_manager import load_collection, save_collection
+
+
+class CollectionStore:
+    """Owned quantities kept in memory and written behind on a short timer.
+
+    Edits within the flush delay are coalesced into one journal append; a steady stream of
+    edits is still flushed at least every max_flush_delay_ms.
+    """
+
+    def __init__(self, root, on_flush: Callable[[Dict[str, int]], None] = None):
+        self.root = root
+        self.data: Dict[str, int] = load_collection()
+        self.on_flush = on_flush
+        self._dirty_keys: Set[str] = set()
+        self._dirty_since = None
+        self._flush_id = None
+
+    def get(self, card_key: str, default: int = 0) -> int:
+        return self.data.get(card_key, default)
+
+    def set(self, card_key: str, qty: int) -> None:
+        self.data[card_key] = qty
+        self._dirty_keys.add(card_key)
+        self.schedule_flush()
+
+    def schedule_flush(self) -> None:
+        config = CONFIG["collection"]
+        now = time.monotonic()
+        if self._dirty_since is None:
+            self._dirty_since = now
+
+        # Debounce, but never hold edits longer than the max delay
+        elapsed_ms = (now - self._dirty_since) * 1000
+        delay_ms = min(config["flush_delay_ms"], max(0, config["max_flush_delay_ms"] - elapsed_ms))
+        if self._flush_id is not None:
+            self.root.after_cancel(self._flush_id)
+        self._flush_id = self.root.after(int(delay_ms), self.flush)
+
+    def flush(self) -> None:
+        if self._flush_id is not None:
+            self.root.after_cancel(self._flush_id)
+            self._flush_id = None
+        if not self._dirty_keys:
+            return
+
+        changed = {k: self.data[k] for k in self._dirty_keys if k in self.data}
+        try:
+            save_collection(self.data, changed)
+        except OSError as e:
+            logging.error(f"Failed to save collection, will retry: {e}")
+            self.schedule_flush()
+            return
+
+        self._dirty_keys.clear()
+        self._dirty_since = None
+        if self.on_flush:
+            self.on_flush(changed)
@@ -11,8 +11,14 @@ CONFIG = {
     "data": {
         "image_folder": "images",
         "cards_file": "cards.json",
+        "cards_snapshot_file": "cards.catalog",
+        "set_folder": "card_sets",
         "collection_file": "collection.json",
-        "deck_folder": "decks"
+        "collection_journal_file": "collection.journal",
+        "collection_history_file": "collection.history",  # None disables the audit trail
+        "deck_folder": "decks",
+        "storage_backend": "json",  # "json" or "sqlite"
+        "database_file": "catalog.db"
     },
     "api": {
         "base_url": "https://api.swu-db.com",
@@ -20,10 +26,36 @@ CONFIG = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
         },
         "timeout": 30,
-        "retry_attempts": 3
+        "retry_attempts": 3,
+        "max_workers": 4,
+        "checkpoint_max_age": 24 * 60 * 60  # seconds a staged set stays resumable
+    },
+    "images": {
+        "cache_bytes": 64 * 1024 * 1024,  # decoded, resized images kept in memory
+        "derived_folder": "sized",  # subfolder of image_folder holding the resized copies
+        # Portrait sizes written next to each downloaded image; landscape art gets them rotated
+        "sizes": {
+            "list": (100, 140),
+            "preview": (300, 420),
+            "detail": (375, 525)
+        },
+        "jpeg_quality": 90,
+        "timeout": 15,
+        "max_workers": 4,  # concurrent art downloads
+        "prefetch_results": 20,  # top search results whose art is fetched ahead of a hover
+        "poll_ms": 50  # how often the Tk thread collects finished downloads
     },
     "default_sets": ['sor', 'shd', 'twi', 'jtl'],
+    "collection": {
+        "flush_delay_ms": 1000,
+        "max_flush_delay_ms": 5000,
+        "journal_compact_bytes": 256 * 1024
+    },
     "search": {
         "fuzzy_threshold": 75,
+        "debounce_ms": 150,
+        "refine_depth": 1,  # characters a query may grow before search rescans the catalog
+        "chunk_size": 512,  # names scored per batch between cancellation checks
+        "poll_ms": 15,  # how often the Tk thread collects finished background searches
     }
 }
\ No newline at end of file
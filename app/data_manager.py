@@ -1,27 +1,364 @@
 import json
 import os
+import shutil
+import threading
+import time
 from app.config import CONFIG
+from app.catalog_db import CatalogDatabase
+from app.card import build_cards
+from app.card_catalog import read_catalog, write_catalog
+from app.card_schema import normalize_cards
 
+SNAPSHOT_VERSION = 7
 
-def load_cards():
+
+def _write_json_atomic(path, data, **dump_kwargs):
+    # Named for the thread, so two threads saving the same file never share a temp file
+    tmp_file = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+def _set_folder():
+    return CONFIG["data"]["set_folder"]
+
+
+def _manifest_file():
+    return os.path.join(_set_folder(), "manifest.json")
+
+
+def _staging_folder():
+    return os.path.join(_set_folder(), ".staging")
+
+
+def load_set_manifest():
+    """Per-set download metadata, in catalog order.
+
+    {"sets": {set_code: {"file", "etag", "last_modified", "sha256", "card_count"}}}
+    """
     try:
-        with open(CONFIG["data"]["cards_file"], encoding='utf-8') as f:
+        with open(_manifest_file(), encoding='utf-8') as f:
             return json.load(f)
     except (FileNotFoundError, json.JSONDecodeError):
+        return {"sets": {}}
+
+
+def _live_set_file(set_code, entry):
+    return os.path.join(_set_folder(), entry.get("file", f"{set_code}.json"))
+
+
+def load_set_cards(set_code, manifest=None):
+    entry = (manifest or load_set_manifest())["sets"].get(set_code)
+    if entry is None:
+        return None
+    try:
+        with open(_live_set_file(set_code, entry), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _catalog_files():
+    # The per-set store supersedes the legacy single cards.json once it exists
+    manifest = load_set_manifest()
+    if manifest["sets"]:
+        return [_live_set_file(code, entry) for code, entry in manifest["sets"].items()]
+    return [CONFIG["data"]["cards_file"]]
+
+
+def _catalog_signature(data_files):
+    paths = list(data_files)
+    if os.path.exists(_manifest_file()):
+        paths.append(_manifest_file())
+
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return signature
+
+
+def _load_snapshot(snapshot_file, signature):
+    # The snapshot is a memory-mapped catalog file; its cards decode long text fields on access
+    try:
+        return read_catalog(snapshot_file, {"version": SNAPSHOT_VERSION, "sources": signature})
+    except Exception:
+        return None  # missing, stale or damaged in any way: rebuild it from the set files
+
+
+def _write_snapshot(snapshot_file, signature, cards):
+    tmp_file = f"{snapshot_file}.tmp"
+    try:
+        write_catalog(tmp_file, {"version": SNAPSHOT_VERSION, "sources": signature}, cards)
+        # Fails on Windows while the previous catalog is still mapped; the next start rebuilds it
+        os.replace(tmp_file, snapshot_file)
+    except OSError as e:
+        print(f"Could not write card snapshot {snapshot_file}: {e}")
+        return False
+    return True
+
+
+def load_cards():
+    snapshot_file = CONFIG["data"]["cards_snapshot_file"]
+    data_files = _catalog_files()
+    signature = _catalog_signature(data_files)
+    if signature is None:
         return []
 
+    cards = _load_snapshot(snapshot_file, signature)
+    if cards is not None:
+        return cards
+
+    cards = []
+    try:
+        for path in data_files:
+            with open(path, encoding='utf-8') as f:
+                cards.extend(normalize_cards(json.load(f)))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+    cards = build_cards(cards)
+    if _write_snapshot(snapshot_file, signature, cards):
+        # Serve the mapped copy so the card text doesn't stay resident
+        return _load_snapshot(snapshot_file, signature) or cards
+    return cards
+
+
+def write_checkpoint(result):
+    """Stage one finished set so an interrupted update can resume without downloading it again"""
+    staging = _staging_folder()
+    os.makedirs(staging, exist_ok=True)
+    meta = {k: v for k, v in result.items() if k != "cards"}
+    meta["staged_at"] = time.time()
+    if result["changed"]:
+        _write_json_atomic(os.path.join(staging, f"{result['set_code']}.json"), result["cards"], ensure_ascii=False)
+    # Meta goes last: its presence marks the checkpoint as complete
+    _write_json_atomic(os.path.join(staging, f"{result['set_code']}.meta.json"), meta)
+
+
+def load_checkpoints():
+    """Return staged set results that are recent enough to resume from, keyed by set code"""
+    staging = _staging_folder()
+    if not os.path.isdir(staging):
+        return {}
+
+    manifest = load_set_manifest()
+    max_age = CONFIG["api"]["checkpoint_max_age"]
+    checkpoints = {}
+    for filename in os.listdir(staging):
+        if not filename.endswith(".meta.json"):
+            continue
+        try:
+            with open(os.path.join(staging, filename), encoding='utf-8') as f:
+                meta = json.load(f)
+            if time.time() - meta.get("staged_at", 0) > max_age:
+                continue
+            if meta["changed"]:
+                with open(os.path.join(staging, f"{meta['set_code']}.json"), encoding='utf-8') as f:
+                    cards = json.load(f)
+            else:
+                cards = load_set_cards(meta["set_code"], manifest)
+        except (OSError, KeyError, json.JSONDecodeError):
+            continue
+        if cards is not None:
+            checkpoints[meta["set_code"]] = {**meta, "cards": cards}
+    return checkpoints
+
+
+def clear_checkpoints():
+    shutil.rmtree(_staging_folder(), ignore_errors=True)
+
+
+def save_card_sets(set_results):
+    """Promote staged sets into the live catalog and return the assembled card list.
+
+    set_results are the per-set dicts produced by CardDataUpdater, in catalog order, each
+    already checkpointed. Set files are named by content hash, so promoting them never
+    touches files the live manifest points at; replacing the manifest is the atomic swap.
+    """
+    os.makedirs(_set_folder(), exist_ok=True)
+    old_manifest = load_set_manifest()
+    manifest = {"sets": {}}
+    cards = []
+    for result in set_results:
+        set_code = result["set_code"]
+        if result["changed"]:
+            filename = f"{set_code}-{result['sha256'][:12]}.json"
+            staged_file = os.path.join(_staging_folder(), f"{set_code}.json")
+            live_file = os.path.join(_set_folder(), filename)
+            if os.path.exists(staged_file):
+                os.replace(staged_file, live_file)
+            else:
+                _write_json_atomic(live_file, result["cards"], ensure_ascii=False)
+        else:
+            filename = old_manifest["sets"].get(set_code, {}).get("file", f"{set_code}.json")
+        manifest["sets"][set_code] = {
+            "file": filename,
+            "etag": result["etag"],
+            "last_modified": result["last_modified"],
+            "sha256": result["sha256"],
+            "card_count": len(result["cards"]),
+        }
+        # Unchanged sets come straight from their JSON files and still need typing
+        cards.extend(normalize_cards(result["cards"]))
+    cards = build_cards(cards)
+
+    _write_json_atomic(_manifest_file(), manifest, indent=2)
+    clear_checkpoints()
+
+    # Drop set files the new manifest no longer references
+    live_files = {entry["file"] for entry in manifest["sets"].values()}
+    for filename in os.listdir(_set_folder()):
+        if filename.endswith(".json") and filename != "manifest.json" and filename not in live_files:
+            os.remove(os.path.join(_set_folder(), filename))
+
+    snapshot_file, signature = CONFIG["data"]["cards_snapshot_file"], _catalog_signature(_catalog_files())
+    if _write_snapshot(snapshot_file, signature, cards):
+        return _load_snapshot(snapshot_file, signature) or cards
+    return cards
+
+
+def _source_signature():
+    return json.dumps(_catalog_signature(_catalog_files()))
+
+
+def open_catalog_db(cards, collection):
+    """Open the SQLite backend when enabled, re-ingesting anything that changed on disk"""
+    if CONFIG["data"]["storage_backend"] != "sqlite":
+        return None
+
+    db = CatalogDatabase(CONFIG["data"]["database_file"])
+    if db.get_meta("cards_source") != _source_signature():
+        ingest_catalog_db(db, cards)
+    db.save_collection(collection)
+    # Deck files may have been renamed, moved or deleted since the last run
+    db.replace_decks(load_deck_contents())
+    return db
+
+
+def load_deck_contents():
+    """Card counts of every deck file, keyed "folder/deck name" """
+    decks = {}
+    deck_folder = CONFIG["data"]["deck_folder"]
+    if not os.path.isdir(deck_folder):
+        return decks
+    for folder in os.listdir(deck_folder):
+        folder_path = os.path.join(deck_folder, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        for filename in os.listdir(folder_path):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(folder_path, filename), encoding='utf-8') as f:
+                    decks[f"{folder}/{filename[:-5]}"] = json.load(f).get("cards", {})
+            except (OSError, json.JSONDecodeError):
+                continue
+    return decks
+
+
+def ingest_catalog_db(db, cards):
+    db.ingest_cards(cards)
+    db.set_meta("cards_source", _source_signature())
+
 
 def load_collection():
+    """Load the last collection snapshot and replay the change journal over it"""
+    collection = {}
     collection_file = CONFIG["data"]["collection_file"]
     if os.path.exists(collection_file):
         try:
             with open(collection_file) as f:
-                return json.load(f)
+                collection = json.load(f)
         except json.JSONDecodeError:
-            return {}
-    return {}
+            collection = {}
+
+    for record in load_collection_journal():
+        collection[record["card_key"]] = record["qty"]
+    return collection
+
+
+def load_collection_journal(card_key=None):
+    """Change records since the last compaction, oldest first: {"card_key", "qty", "timestamp"}"""
+    records = []
+    try:
+        with open(CONFIG["data"]["collection_journal_file"], encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append; everything before it is intact
+                    continue
+                if card_key is None or record["card_key"] == card_key:
+                    records.append(record)
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def save_collection(collection, changes=None):
+    """Append changes to the journal, or write a full snapshot when changes is None.
+
+    The journal is compacted into a fresh snapshot once it grows past the configured size.
+    """
+    journal_file = CONFIG["data"]["collection_journal_file"]
+    if changes is not None:
+        timestamp = time.time()
+        with open(journal_file, 'a+b') as f:
+            # Terminate a torn line left by a crash so it doesn't swallow the next record
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                f.seek(end - 1)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            for card_key, qty in changes.items():
+                record = {"card_key": card_key, "qty": qty, "timestamp": timestamp}
+                f.write((json.dumps(record) + "\n").encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.getsize(journal_file) < CONFIG["collection"]["journal_compact_bytes"]:
+            return
+
+    _write_json_atomic(CONFIG["data"]["collection_file"], collection, indent=2)
+    # The snapshot now holds every journalled change; the journal only feeds the history
+    history_file = CONFIG["data"]["collection_history_file"]
+    if not history_file:
+        if os.path.exists(journal_file):
+            os.remove(journal_file)
+        return
+
+    # A segment left by a crash mid-compaction is finished first, so segments stay in order
+    for segment, offset in _history_segments(journal_file):
+        _append_history_segment(segment, history_file, offset)
+    if os.path.exists(journal_file):
+        offset = os.path.getsize(history_file) if os.path.exists(history_file) else 0
+        segment = f"{journal_file}.{offset}"
+        os.replace(journal_file, segment)
+        _append_history_segment(segment, history_file, offset)
+
+
+def _history_segments(journal_file):
+    # Journals being moved into the history are named after the history size they start at
+    folder, name = os.path.split(journal_file)
+    prefix = f"{name}."
+    for filename in sorted(os.listdir(folder or ".")):
+        if filename.startswith(prefix) and filename[len(prefix):].isdigit():
+            yield os.path.join(folder, filename), int(filename[len(prefix):])
 
 
-def save_collection(collection):
-    with open(CONFIG["data"]["collection_file"], 'w') as f:
-        json.dump(collection, f, indent=2)
+def _append_history_segment(segment, history_file, offset):
+    with open(history_file, 'a+b') as dst:
+        # Cut back anything a crashed earlier attempt appended, so the segment lands once
+        if dst.seek(0, os.SEEK_END) > offset:
+            dst.truncate(offset)
+        with open(segment, 'rb') as src:
+            shutil.copyfileobj(src, dst)
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.remove(segment)
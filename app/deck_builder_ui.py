@@ -2,9 +2,12 @@ import os
 import json
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox
-from rapidfuzz import fuzz
+from PIL import ImageTk
 
 from app.config import CONFIG
+from app.card_query import parse_query
+from app.image_prefetcher import PRIORITY_DECK, art_size
+from app.search_engine import SearchSession, query_filters
 
 
 class DeckBuilderTab:
@@ -25,6 +28,8 @@ class DeckBuilderTab:
         self.search_menu = tk.Menu(self.root, tearoff=0)
         self.search_popup = None
         self.dropdown_active_index = 0  # Track the active index for hover preview
+        self.search_session = SearchSession(app.search_engine)
+        self._preview_key = None
 
         self.setup_layout()
         self.load_deck_tree()
@@ -125,7 +130,7 @@ class DeckBuilderTab:
         tk.Label(search_frame, text="Add Card:").pack(side="left", padx=2)
         self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=40, state="disabled")
         self.search_entry.pack(side="left", padx=2)
-        self.search_entry.bind("<KeyRelease>", self.update_search_dropdown)
+        self.search_entry.bind("<KeyRelease>", self.debounce_search)
 
         tk.Checkbutton(search_frame, text="From Inventory Only", variable=self.from_inventory_var, command=self.update_search_dropdown).pack(side="left", padx=10)
 
@@ -156,10 +161,7 @@ class DeckBuilderTab:
     def _open_column_config(self):
         default_order = ["CardKey", "Owned", "In Deck", "Name", "Set", "Type", "Arenas", "Aspect"]
 
-        # Get all possible keys from cards
-        all_keys = set()
-        for card in self.app.cards:
-            all_keys.update(card.keys())
+        all_keys = set(self.app.card_schema.fields)
         all_keys.update(default_order)
 
         # Preserve default order and append any extras
@@ -297,6 +299,8 @@ class DeckBuilderTab:
             return
 
         os.rename(current_path, new_path)
+        if self.app.catalog_db:
+            self.app.catalog_db.rename_deck(f"{current_folder}/{deck_name}", f"{dest}/{deck_name}")
         self.load_deck_tree()
 
     def rename_deck(self):
@@ -347,6 +351,8 @@ class DeckBuilderTab:
             
             # Remove old file
             os.remove(old_path)
+            if self.app.catalog_db:
+                self.app.catalog_db.rename_deck(f"{folder}/{deck_name}", f"{folder}/{new_name}")
             
         except FileNotFoundError:
             messagebox.showerror("Error", f"Deck file not found:\n{old_path}")
@@ -397,6 +403,8 @@ class DeckBuilderTab:
 
         try:
             os.remove(deck_path)
+            if self.app.catalog_db:
+                self.app.catalog_db.delete_deck(f"{folder}/{deck_name}")
             self.load_deck_tree()
             self.deck_data = {}
             self.deck_name_var.set("")
@@ -431,27 +439,28 @@ class DeckBuilderTab:
         self.value_var.set("Estimated Value: $TODO")
 
         # Find all leaders and bases in the deck
-        leaders = [k for k in self.deck_data.get("cards", {}) if next((c for c in self.app.cards if c["card_key"] == k and c["Type"] == "Leader"), None)]
-        bases = [k for k in self.deck_data.get("cards", {}) if next((c for c in self.app.cards if c["card_key"] == k and c["Type"] == "Base"), None)]
+        index = self.app.card_index
+        leaders = [k for k in self.deck_data.get("cards", {}) if index.is_type(k, "Leader")]
+        bases = [k for k in self.deck_data.get("cards", {}) if index.is_type(k, "Base")]
 
         # Build Leader display
         if not leaders:
             leader_display = "Leader: None"
         elif len(leaders) == 1:
-            leader_name = next(c["Name"] for c in self.app.cards if c["card_key"] == leaders[0])
+            leader_name = index.get(leaders[0])["Name"]
             leader_display = f"Leader: {leader_name}"
         else:
-            names = [next(c["Name"] for c in self.app.cards if c["card_key"] == k) for k in leaders]
+            names = [index.get(k)["Name"] for k in leaders]
             leader_display = f"Leader: {', '.join(names)} [ERROR: Too many Leaders]"
 
         # Same for Base
         if not bases:
             base_display = "Base: None"
         elif len(bases) == 1:
-            base_name = next(c["Name"] for c in self.app.cards if c["card_key"] == bases[0])
+            base_name = index.get(bases[0])["Name"]
             base_display = f"Base: {base_name}"
         else:
-            names = [next(c["Name"] for c in self.app.cards if c["card_key"] == k) for k in bases]
+            names = [index.get(k)["Name"] for k in bases]
             base_display = f"Base: {', '.join(names)} [ERROR: Too many Bases]"
 
         self.leader_var.set(leader_display)
@@ -468,15 +477,22 @@ class DeckBuilderTab:
         self.card_tree.delete(*self.card_tree.get_children())
         self.card_tree["displaycolumns"] = self.visible_columns
 
+        # Warm the art of every card in the deck, behind anything shown or searched for
+        deck_cards = [self.app.card_index.get(k) for k in self.deck_data.get("cards", {})]
+        self.app.image_prefetcher.warm("deck", (
+            (card["card_key"], "front", art_size(card, "front", "preview"), card.get("FrontArt", ""))
+            for card in deck_cards if card
+        ), PRIORITY_DECK)
+
         for card_key, count in self.deck_data.get("cards", {}).items():
-            card = next((c for c in self.app.cards if c["card_key"] == card_key), {})
+            card = self.app.card_index.get(card_key, {})
             row_data = dict(card)
             row_data["CardKey"] = card_key
             row_data["Owned"] = self.app.collection.get(card_key, 0)
             row_data["In Deck"] = count
 
             # Make sure everything is converted to string for display
-            values = [json.dumps(row_data.get(col, "")) if isinstance(row_data.get(col), (list, dict)) else str(row_data.get(col, "")) for col in self.card_tree["columns"]]
+            values = [json.dumps(row_data.get(col, "")) if isinstance(row_data.get(col), (list, tuple, dict)) else str(row_data.get(col, "")) for col in self.card_tree["columns"]]
             self.card_tree.insert("", "end", values=values)
 
     def save_deck_status(self, event=None):
@@ -491,6 +507,8 @@ class DeckBuilderTab:
         deck_path = os.path.join(self.deck_folder, folder, f"{deck_name}.json")
         with open(deck_path, "w") as f:
             json.dump(self.deck_data, f, indent=2)
+        if self.app.catalog_db:
+            self.app.catalog_db.save_deck(f"{folder}/{deck_name}", self.deck_data.get("cards", {}))
 
     def rename_folder(self):
         selected = self.deck_tree.focus()
@@ -510,6 +528,8 @@ class DeckBuilderTab:
             return
 
         os.rename(old_path, new_path)
+        if self.app.catalog_db:
+            self.app.catalog_db.rename_deck_folder(old_name, new_name)
         self.load_deck_tree()
 
     def update_breakdown_charts(self):
@@ -523,21 +543,30 @@ class DeckBuilderTab:
             return
 
         query = self.search_var.get().lower()
-        if getattr(self, "last_query", None) == query:
-            return  # Prevent rebuild if query hasn't changed
-        self.last_query = query
+        parsed = parse_query(query)
+        if not parsed.text and not parsed.terms:
+            # Nothing to look for yet, whichever backend would answer
+            self.app.search_scheduler.cancel("deck")
+            self.search_session.reset()
+            self._render_search_dropdown([])
+            return
+
+        owned_mask = self.app.owned_index.mask if self.from_inventory_var.get() else None
+        session = self.search_session
+        if session.is_current(parsed.text, query_filters(parsed, owned_mask=owned_mask)):
+            # The dropdown already shows this; drop a search for some other text still under way
+            self.app.search_scheduler.cancel("deck")
+            return
 
-        cards = self.app.cards
-        if self.from_inventory_var.get():
-            cards = [c for c in cards if self.app.collection.get(c["card_key"], 0) > 0]
+        def apply(outcome):
+            session.commit(outcome.result)
+            self._render_search_dropdown(outcome.cards)
 
-        matches = sorted(
-            [(fuzz.partial_ratio(query, c.get("Name", "").lower()), c) for c in cards],
-            key=lambda x: x[0],
-            reverse=True
-        )
-        self.matching_cards = [c for score, c in matches if score > CONFIG["search"]["fuzzy_threshold"]]
+        search = session.query(parsed, owned_mask=owned_mask, catalog_db=self.app.catalog_db, limit=20)
+        self.app.search_scheduler.submit("deck", search, apply)
 
+    def _render_search_dropdown(self, matching_cards):
+        self.matching_cards = matching_cards
         if not self.matching_cards:
             if hasattr(self, "search_popup") and self.search_popup:
                 self.search_popup.destroy()
@@ -561,6 +590,11 @@ class DeckBuilderTab:
         else:
             self.search_listbox.delete(0, tk.END)
 
+        self.app.image_prefetcher.warm("deck-search", (
+            (card["card_key"], "front", art_size(card, "front", "preview"), card.get("FrontArt", ""))
+            for card in self.matching_cards[:CONFIG["images"]["prefetch_results"]]
+        ))
+
         for idx, card in enumerate(self.matching_cards[:20]):
             subtitle = card.get("Subtitle", "").strip()
             if subtitle:
@@ -585,7 +619,7 @@ class DeckBuilderTab:
             if hasattr(self, "hover_preview") and self.hover_preview:
                 self.hover_preview.destroy()
                 self.hover_preview = None
-            self.last_query = ""
+            self.search_session.reset()
             self.dropdown_active_index = 0
             self.search_entry.focus_set()
 
@@ -645,27 +679,17 @@ class DeckBuilderTab:
         if not art_url:
             return
 
-        from PIL import Image, ImageTk
-        import requests
-
         card_key = card["card_key"]
-        cache_path = os.path.join(CONFIG["data"]["image_folder"], f"{card_key}_front.jpg")
-        os.makedirs(CONFIG["data"]["image_folder"], exist_ok=True)
+        position = f"+{event.x_root+20}+{event.y_root+10}"
+        if getattr(self, "hover_preview", None) and self._preview_key == card_key:
+            # Still over the same row: follow the pointer without rebuilding the image
+            self.hover_preview.geometry(position)
+            return
 
         try:
-            if not os.path.exists(cache_path):
-                img_data = requests.get(art_url).content
-                with open(cache_path, "wb") as f:
-                    f.write(img_data)
-
-            img = Image.open(cache_path)
-            card_type = card.get("Type", "").lower()
-            if card_type in ["leader", "base"]:
-                img = img.resize((420, 300), Image.Resampling.LANCZOS)
-            else:
-                img = img.resize((300, 420), Image.Resampling.LANCZOS)
-
-            photo = ImageTk.PhotoImage(img)
+            size = art_size(card, "front", "preview")
+            img = self.app.image_prefetcher.get(card_key, "front", size, art_url,
+                                                lambda img: self._set_preview_image(card_key, img))
 
             # Destroy previous preview if it exists
             if hasattr(self, "hover_preview") and self.hover_preview:
@@ -676,15 +700,24 @@ class DeckBuilderTab:
 
             self.hover_preview = tk.Toplevel(self.root)
             self.hover_preview.wm_overrideredirect(True)
-            self.hover_preview.geometry(f"+{event.x_root+20}+{event.y_root+10}")
+            self.hover_preview.geometry(position)
+            self._preview_key = card_key
 
-            img_label = tk.Label(self.hover_preview, image=photo)
-            img_label.image = photo  # Keep reference
-            img_label.pack()
+            self.preview_label = tk.Label(self.hover_preview)
+            self.preview_label.pack()
+            self._set_preview_image(card_key, img)
 
         except Exception as e:
             print("Image preview error:", e)
 
+    def _set_preview_image(self, card_key, img):
+        # Also the prefetcher's callback, by which time the pointer may have moved on
+        if img is None or not getattr(self, "hover_preview", None) or self._preview_key != card_key:
+            return
+        photo = ImageTk.PhotoImage(img)
+        self.preview_label.configure(image=photo)
+        self.preview_label.image = photo  # Keep reference
+
     def _hide_preview(self, event):
         if hasattr(self, "hover_preview") and self.hover_preview:
             for widget in self.hover_preview.winfo_children():
@@ -760,7 +793,5 @@ class DeckBuilderTab:
         entry.bind("<FocusOut>", save_edit)
 
     def debounce_search(self, event=None):
-        if hasattr(self, "search_after_id"):
-            self.root.after_cancel(self.search_after_id)
-        self.search_after_id = self.root.after(150, self.update_search_dropdown)
+        self.app.search_scheduler.schedule("deck", self.update_search_dropdown)
 
@@ -0,0 +1,64 @@
+from typing import *
+
+FACET_FIELDS = ("Set", "Type", "Aspects", "Arenas")
+
+
+def facet_values(card: Dict[str, Any], field: str) -> List[str]:
+    value = card.get(field)
+    if isinstance(value, (list, tuple)):
+        return [v for v in value if v]
+    return [v for v in (value or "").split(", ") if v]
+
+
+def bits_from_indices(indices: Iterable[int], size: int) -> int:
+    buf = bytearray((size + 7) // 8)
+    for i in indices:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Yield the set bit positions of bits in ascending order"""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield (byte_index << 3) + low.bit_length() - 1
+            byte ^= low
+
+
+class FacetIndex:
+    """Per-value bitsets over card positions for the Set/Type/Aspect/Arena filters.
+
+    Bit i stands for the i-th card of the catalog the index was built from, so a filter
+    is a handful of integer ANDs instead of a pass over every card.
+    """
+
+    def __init__(self, cards: List[Dict[str, Any]] = None):
+        self.rebuild(cards or [])
+
+    def rebuild(self, cards: List[Dict[str, Any]]) -> None:
+        self.size = len(cards)
+        self.all_bits = (1 << self.size) - 1
+        positions: Dict[str, Dict[str, List[int]]] = {field: {} for field in FACET_FIELDS}
+        for i, card in enumerate(cards):
+            for field in FACET_FIELDS:
+                for value in facet_values(card, field):
+                    positions[field].setdefault(value, []).append(i)
+
+        self.bits: Dict[str, Dict[str, int]] = {
+            field: {value: bits_from_indices(indices, self.size) for value, indices in values.items()}
+            for field, values in positions.items()
+        }
+
+    def values(self, field: str, mask: int = None) -> List[str]:
+        """Sorted values of field, limited to values present in mask when given"""
+        return sorted(v for v, bits in self.bits[field].items() if mask is None or bits & mask)
+
+    def filter(self, selections: Dict[str, str]) -> int:
+        """Intersect the selected facet values; "All" or an empty selection leaves a field open"""
+        mask = self.all_bits
+        for field, value in selections.items():
+            if value and value != "All":
+                mask &= self.bits[field].get(value, 0)
+        return mask
@@ -0,0 +1,171 @@
+from typing import *
+import itertools
+import logging
+import queue
+import threading
+from PIL import Image
+
+from app.card import ImageManager
+from app.card_updater import create_session
+from app.config import CONFIG
+
+# Lower runs first
+PRIORITY_SHOWN = 0  # an image a widget is waiting to display
+PRIORITY_RESULTS = 1  # top search results, likely to be hovered or opened next
+PRIORITY_DECK = 2  # cards of the loaded deck
+
+ImageKey = Tuple[str, str, Tuple[int, int]]  # card_key, face, size
+
+
+def art_size(card: Dict[str, Any], face: str, view: str) -> Tuple[int, int]:
+    """Display size of a card face for a view in CONFIG["images"]["sizes"].
+
+    Leader and Base fronts are landscape, so they get the size rotated.
+    """
+    width, height = CONFIG["images"]["sizes"][view]
+    if face == "front" and card.get("Type", "").lower() in ("leader", "base"):
+        return height, width
+    return width, height
+
+
+class _Job:
+    __slots__ = ("priority", "url", "groups", "callbacks", "running")
+
+    def __init__(self, priority, url):
+        self.priority = priority
+        self.url = url
+        self.groups: Set[Hashable] = set()  # warm() groups that still want the image
+        self.callbacks: List[Callable[[Optional[Image.Image]], None]] = []
+        self.running = False
+
+
+class ImagePrefetcher:
+    """Downloads and decodes card art on worker threads so the Tk thread never waits on the network.
+
+    Requests go into a priority queue served by a bounded pool sharing one HTTP session. A
+    request for an image that is already queued or downloading joins it rather than fetching it
+    twice, and raises its priority if it is more urgent. Finished images are handed back to the
+    Tk thread through a queue and passed to the waiting callbacks there.
+
+    warm() fills the queue for a group of cards (a tab's search results, the loaded deck); a new
+    warm() for the same group withdraws that group from what is still queued from the previous
+    one, which is dropped once no group or callback wants it any more.
+    """
+
+    def __init__(self, root, image_manager: ImageManager, max_workers: int = None):
+        self.root = root
+        self.image_manager = image_manager
+        self.max_workers = max_workers or CONFIG["images"]["max_workers"]
+        self.session = create_session(self.max_workers)
+        self._jobs: Dict[ImageKey, _Job] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.PriorityQueue[tuple]" = queue.PriorityQueue()
+        self._order = itertools.count()  # FIFO among equal priorities
+        self._results: "queue.Queue[tuple]" = queue.Queue()
+        self._placeholders: Dict[Tuple[int, int], Image.Image] = {}
+        self._poll_id = None
+        self._stopped = False
+        self._workers = [
+            threading.Thread(target=self._work, name=f"image-prefetch-{i}", daemon=True)
+            for i in range(self.max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def get(self, card_key: str, face: str, size: Tuple[int, int], url: str,
+            callback: Callable[[Optional[Image.Image]], None]) -> Image.Image:
+        """The image if it is already in memory; otherwise a blank card to show meanwhile, and
+        callback(image) runs on the Tk thread once it is loaded (with None if it could not be)."""
+        image = self.image_manager.cached_card_image(card_key, face, size)
+        if image is not None:
+            return image
+        self._request((card_key, face, size), url, PRIORITY_SHOWN, None, callback)
+        return self._placeholder(size)
+
+    def warm(self, group: Hashable, requests: Iterable[Tuple[str, str, Tuple[int, int], str]],
+             priority: int = PRIORITY_RESULTS) -> None:
+        """Queue (card_key, face, size, url) requests in place of the group's previous ones"""
+        requests = [(card_key, face, size, url) for card_key, face, size, url in requests if url]
+        wanted = {(card_key, face, size) for card_key, face, size, _ in requests}
+        with self._lock:
+            for key, job in list(self._jobs.items()):
+                if group not in job.groups or key in wanted:
+                    continue
+                job.groups.discard(group)
+                if not job.groups and not job.running and not job.callbacks:
+                    del self._jobs[key]  # its queue entry is skipped when it comes up
+        for card_key, face, size, url in requests:
+            if self.image_manager.cached_card_image(card_key, face, size) is None:
+                self._request((card_key, face, size), url, priority, group, None)
+
+    def _placeholder(self, size):
+        image = self._placeholders.get(size)
+        if image is None:
+            image = self._placeholders[size] = Image.new("RGB", size, "#d9d9d9")
+        return image
+
+    def shutdown(self) -> None:
+        self._stopped = True
+        with self._lock:
+            self._jobs.clear()
+        for _ in self._workers:
+            self._queue.put((-1, next(self._order), None))  # wakes each worker to exit
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        self.session.close()
+
+    def _request(self, key, url, priority, group, callback):
+        if self._stopped:
+            return
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                job = self._jobs[key] = _Job(priority, url)
+            elif priority < job.priority and not job.running:
+                job.priority = priority  # queued again; the older entry is skipped
+            else:
+                priority = None  # already queued at least this urgently, or downloading
+            if group is not None:
+                job.groups.add(group)
+            if callback is not None:
+                job.callbacks.append(callback)
+        if priority is not None:
+            self._queue.put((priority, next(self._order), key))
+        if self._poll_id is None:
+            self._poll_id = self.root.after(CONFIG["images"]["poll_ms"], self._poll)
+
+    def _work(self):
+        while True:
+            priority, _, key = self._queue.get()
+            if key is None:
+                return
+            with self._lock:
+                job = self._jobs.get(key)
+                if job is None or job.running or job.priority != priority:
+                    continue  # dropped, or superseded by a more urgent entry
+                job.running = True
+
+            image = None
+            try:
+                image = self.image_manager.get_card_image(*key, job.url, self.session)
+            except Exception:
+                logging.error(f"Failed to load art for {key[0]} ({key[1]})", exc_info=True)
+            self._results.put((key, image))
+
+    def _poll(self):
+        while True:
+            try:
+                key, image = self._results.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                job = self._jobs.pop(key, None)
+            for callback in job.callbacks if job else ():
+                callback(image)
+
+        self._poll_id = None
+        with self._lock:
+            busy = bool(self._jobs)
+        if busy and not self._stopped:
+            self._poll_id = self.root.after(CONFIG["images"]["poll_ms"], self._poll)
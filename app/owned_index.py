@@ -0,0 +1,64 @@
+from typing import *
+
+from app.facet_index import FACET_FIELDS, facet_values, iter_bits
+
+
+class OwnedIndex:
+    """The owned part of the collection, kept in step with quantity changes.
+
+    Holds the owned cards as a bitset over catalog positions plus per-facet owned counts
+    (cards per Set, Type, Aspect and Arena). Only a change that crosses zero touches it, so
+    owned views cost time in proportion to the owned cards rather than the catalog.
+    """
+
+    def __init__(self):
+        self.engine = None
+        self.mask = 0
+        self.counts: Dict[str, Dict[str, int]] = {field: {} for field in FACET_FIELDS}
+
+    def rebuild(self, engine, collection: Dict[str, int]) -> None:
+        self.engine = engine
+        self.mask = 0
+        self.counts = {field: {} for field in FACET_FIELDS}
+        for card_key, qty in collection.items():
+            if qty > 0:
+                self._add(card_key)
+
+    def update(self, card_key: str, old_qty: int, new_qty: int) -> None:
+        if old_qty <= 0 < new_qty:
+            self._add(card_key)
+        elif new_qty <= 0 < old_qty:
+            self._remove(card_key)
+
+    def __contains__(self, card_key: str) -> bool:
+        i = self.engine.positions.get(card_key)
+        return i is not None and bool(self.mask >> i & 1)
+
+    def cards(self) -> List[Dict[str, Any]]:
+        """Owned cards in catalog order"""
+        cards = self.engine.cards
+        return [cards[i] for i in iter_bits(self.mask)]
+
+    def values(self, field: str) -> List[str]:
+        """Sorted values of field among the owned cards"""
+        return sorted(value for value, count in self.counts[field].items() if count > 0)
+
+    def _add(self, card_key):
+        i = self.engine.positions.get(card_key)
+        if i is None or self.mask >> i & 1:
+            return  # not in the catalog, or already counted
+        self.mask |= 1 << i
+        self._count(self.engine.cards[i], 1)
+
+    def _remove(self, card_key):
+        i = self.engine.positions.get(card_key)
+        if i is None or not self.mask >> i & 1:
+            return
+        self.mask &= ~(1 << i)
+        self._count(self.engine.cards[i], -1)
+
+    def _count(self, card, delta):
+        for field in FACET_FIELDS:
+            counts = self.counts[field]
+            for value in facet_values(card, field):
+                counts[value] = counts.get(value, 0) + delta
@@ -0,0 +1,300 @@
+from typing import *
+from bisect import bisect_right
+import copy
+import threading
+from rapidfuzz import fuzz, process
+
+from app.card_query import ParsedQuery, QueryIndex
+from app.config import CONFIG
+from app.facet_index import FacetIndex, iter_bits
+
+
+def refine_cutoff(query_len: int, extra_chars: int, threshold: float) -> float:
+    """Lowest score a name can have for a query of query_len and still reach threshold
+    after extra_chars more characters are typed.
+
+    Each appended character, and trimming the matched window to match, is one indel, so
+    for names longer than the extended query the indel distance shrinks by at most 2k:
+    score(q) >= 1 - ((1 - t) * (2n + 2k) + 2k) / 2n.
+    """
+    if query_len == 0:
+        return 0.0
+    t, n, k = threshold / 100, query_len, extra_chars
+    return max(0.0, 100 * (1 - ((1 - t) * (2 * n + 2 * k) + 2 * k) / (2 * n)))
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+class SearchEngine:
+    """Fuzzy name search over a pre-normalized name array shared by every tab"""
+
+    def __init__(self, cards: List[Dict[str, Any]] = None):
+        self.rebuild(cards or [])
+
+    def rebuild(self, cards: List[Dict[str, Any]]) -> None:
+        self.cards = cards
+        self.names = [card.get("Name", "").lower() for card in cards]
+        self.positions = {card["card_key"]: i for i, card in enumerate(cards)}
+        self.facets = FacetIndex(cards)
+        # Shared with snapshots of this catalog, so whichever builds it first builds it once
+        self._query_index = _LazyQueryIndex(cards, self.facets)
+        # Card indices ordered by name length, for "names no longer than n" lookups
+        self._by_length = sorted(range(len(cards)), key=lambda i: len(self.names[i]))
+        self._lengths = [len(self.names[i]) for i in self._by_length]
+
+    @property
+    def query_index(self) -> QueryIndex:
+        """Index for fielded query terms, built on first use.
+
+        Building it reads and tokenizes every card's rules text, so it is left to the first
+        search with field terms, which runs on the search worker, instead of catalog load.
+        """
+        return self._query_index.get()
+
+    def snapshot(self) -> "SearchEngine":
+        """The current catalog's arrays, unaffected by a later rebuild()"""
+        return copy.copy(self)  # rebuild() replaces the arrays rather than mutating them
+
+    def keys_in(self, mask: int, card_keys: Iterable[str]) -> List[str]:
+        """card_keys whose card is in mask, in the given order"""
+        positions = self.positions
+        return [k for k in card_keys if k in positions and mask >> positions[k] & 1]
+
+    def candidates(self, mask: int) -> Optional[List[int]]:
+        """Card indices in mask, or None when mask covers the whole catalog"""
+        return None if mask == self.facets.all_bits else list(iter_bits(mask))
+
+    def score_one(self, query: str, index: int) -> float:
+        return fuzz.partial_ratio(query.lower(), self.names[index])
+
+    def names_no_longer_than(self, length: int) -> List[int]:
+        return self._by_length[:bisect_right(self._lengths, length)]
+
+    def score(self, query: str, candidates: Iterable[int] = None, cutoff: float = 0,
+              cancelled: Callable[[], bool] = None) -> List[Tuple[int, float]]:
+        """Unranked (card index, score) pairs scoring at least cutoff.
+
+        Names are scored in batch calls of CONFIG["search"]["chunk_size"]; cancelled is
+        checked between batches and raises SearchCancelled once it returns True.
+        """
+        names = self.names
+        indices = range(len(names)) if candidates is None else list(candidates)
+        chunk_size = CONFIG["search"]["chunk_size"]
+        scored = []
+        for start in range(0, len(indices), chunk_size):
+            if cancelled and cancelled():
+                raise SearchCancelled()
+            chunk = indices[start:start + chunk_size]
+            choices = names[start:start + chunk_size] if candidates is None else [names[i] for i in chunk]
+            matches = process.extract(query, choices, scorer=fuzz.partial_ratio, score_cutoff=cutoff, limit=None)
+            scored.extend((chunk[j], score) for _, score, j in matches)
+        return scored
+
+    def search(self, query: str, candidates: Iterable[int] = None, limit: int = None,
+               cancelled: Callable[[], bool] = None) -> List[Tuple[int, float]]:
+        """Score names against query in batch calls.
+
+        Returns (card index, score) pairs, best first; ties keep catalog order.
+        candidates restricts scoring to those card indices.
+        """
+        query = query.lower()
+        if not query:
+            indices = range(len(self.cards)) if candidates is None else candidates
+            return [(i, 100) for i in indices][:limit]
+        return rank(self.score(query, candidates, CONFIG["search"]["fuzzy_threshold"], cancelled))[:limit]
+
+
+class _LazyQueryIndex:
+    def __init__(self, cards: List[Dict[str, Any]], facets: FacetIndex):
+        self._cards, self._facets = cards, facets
+        self._index: Optional[QueryIndex] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> QueryIndex:
+        with self._lock:
+            if self._index is None:
+                self._index = QueryIndex(self._cards, self._facets)
+            return self._index
+
+
+def rank(scored: Iterable[Tuple[int, float]]) -> List[Tuple[int, float]]:
+    # Best score first, ties broken by catalog order
+    return sorted(scored, key=lambda m: (-m[1], m[0]))
+
+
+class SearchResult(NamedTuple):
+    """A finished SearchSession scan, with what refining it later needs"""
+    query: str
+    mask: Optional[int]
+    catalog: List[Dict[str, Any]]
+    matches: List[Tuple[int, float]]
+    scope: Optional[Set[int]]
+    anchor: Optional[Tuple[str, float, Set[int]]]  # (query, pool cutoff, card indices scoring at least the cutoff)
+    filters: Hashable = None  # the caller's description of what mask was built from
+
+
+class QueryOutcome(NamedTuple):
+    """What a SearchSession.query() run found, for the Tk thread to show"""
+    cards: List[Dict[str, Any]]  # matches in rank order, owned filter applied
+    accepts: Callable[[Dict[str, Any]], bool]  # whether a card passes every filter but ownership
+    rank_key: Optional[Callable[[Dict[str, Any]], Any]]  # places one card in rank order, if known
+    engine: "SearchEngine"  # the snapshot the cards came from
+    result: Optional[SearchResult]  # to commit(); None when SQLite answered
+
+
+_SQL_FACETS = ("Set", "Type", "Aspects", "Arenas")  # CatalogDatabase.search's facet arguments
+
+
+class SearchSession:
+    """One tab's view of the SearchEngine that remembers its previous scan.
+
+    A full scan of query q0 also keeps the near-misses that could still reach the fuzzy
+    threshold once up to refine_depth characters are appended (see refine_cutoff). While
+    the query keeps extending q0 under the same facet mask, including after a backspace,
+    only those near-misses and the names shorter than the query are re-scored, which gives
+    exactly the full-scan result. Anything else starts a new full scan.
+
+    search() may run on a worker thread and leaves the session alone; the Tk thread
+    commit()s its result once it decides to show it, so the session always describes the
+    results on screen. Callers that build the mask on the worker too pass a cheap filters
+    description instead, which is what is_current() compares. query() does all of this for
+    a parsed query, including the facet, term and owned filters and the SQLite backend.
+    """
+
+    def __init__(self, engine: SearchEngine):
+        self.engine = engine
+        self.reset()
+
+    def reset(self) -> None:
+        self.result: Optional[SearchResult] = None
+
+    def commit(self, result: Optional[SearchResult]) -> None:
+        """Record the result now on screen; None (an answer from SQLite) leaves nothing to refine"""
+        self.result = result
+
+    @staticmethod
+    def _same_scope(result: Optional[SearchResult], mask: int, engine: SearchEngine) -> bool:
+        return result is not None and mask == result.mask and result.catalog is engine.cards
+
+    def is_current(self, query: str, filters: Hashable = None) -> bool:
+        """Whether the committed result is for query under the same filters and catalog"""
+        result = self.result
+        return (result is not None and result.filters == filters and result.catalog is self.engine.cards
+                and query.lower() == result.query)
+
+    @staticmethod
+    def _refine_candidates(result: SearchResult, query: str, engine: SearchEngine) -> Optional[Set[int]]:
+        if result.anchor is None:
+            return None
+        anchor_query, pool_cutoff, pool = result.anchor
+        extra_chars = len(query) - len(anchor_query)
+        if extra_chars < 0 or not query.startswith(anchor_query):
+            return None
+        threshold = CONFIG["search"]["fuzzy_threshold"]
+        if refine_cutoff(len(anchor_query), extra_chars, threshold) < pool_cutoff:
+            return None
+
+        # partial_ratio swaps needle and haystack for names shorter than the query, so the
+        # bound doesn't cover them; they are always re-scored
+        short_names = engine.names_no_longer_than(len(query))
+        if result.scope is not None:
+            short_names = [i for i in short_names if i in result.scope]
+        return pool.union(short_names)
+
+    def search(self, query: str, mask: int = None, cancelled: Callable[[], bool] = None,
+               engine: SearchEngine = None, filters: Hashable = None) -> SearchResult:
+        """Ranked (card index, score) pairs for query within the facet mask (None = whole
+        catalog), as the matches of a SearchResult to commit().
+
+        engine defaults to the session's; pass a snapshot() taken when the search was
+        requested so card indices stay valid if the catalog is replaced meanwhile. filters is
+        recorded on the result for is_current(). Raises SearchCancelled if cancelled() turns
+        True mid-scan.
+        """
+        query = query.lower()
+        engine = engine or self.engine
+        previous = self.result  # read once; the Tk thread may commit or reset meanwhile
+        same_scope = self._same_scope(previous, mask, engine)
+        if same_scope and query == previous.query:
+            return previous._replace(filters=filters)
+
+        threshold = CONFIG["search"]["fuzzy_threshold"]
+        candidates = self._refine_candidates(previous, query, engine) if same_scope else None
+        if candidates is not None:
+            matches = rank(engine.score(query, candidates, threshold, cancelled))
+            scope, anchor = previous.scope, previous.anchor
+        else:
+            candidates = None if mask is None else engine.candidates(mask)
+            scope = None if candidates is None else set(candidates)
+            anchor = None
+            pool_cutoff = refine_cutoff(len(query), CONFIG["search"]["refine_depth"], threshold)
+            if query and pool_cutoff > 0:
+                scored = engine.score(query, candidates, pool_cutoff, cancelled)
+                anchor = (query, pool_cutoff, {i for i, score in scored})
+                matches = rank((i, score) for i, score in scored if score >= threshold)
+            else:
+                matches = engine.search(query, candidates, cancelled=cancelled)
+
+        return SearchResult(query, mask, engine.cards, matches, scope, anchor, filters)
+
+    def query(self, parsed: ParsedQuery, facets: Dict[str, str] = None, owned_mask: int = None,
+              catalog_db=None, limit: int = None) -> Callable[[Callable[[], bool]], QueryOutcome]:
+        """Start a search for a parsed query; returns compute(cancelled) for the search worker.
+
+        Call on the Tk thread. facets are FacetIndex selections, owned_mask limits the results
+        to owned cards and limit caps how many are returned. With catalog_db, name text and
+        facets are looked up through SQLite instead of fuzzy scoring. The caller commit()s the
+        outcome's result once it shows the cards.
+        """
+        engine = self.engine.snapshot()  # the worker's view, should the catalog be replaced meanwhile
+        facets = facets or {}
+        filters = query_filters(parsed, facets, owned_mask)
+        if catalog_db:
+            # The SQLite connection belongs to the Tk thread, and FTS lookups are fast anyway.
+            # Owned cards come from the in-memory mask rather than a join, because the
+            # database's copy of the collection is only updated when the collection is flushed
+            filtered_later = parsed.terms or owned_mask is not None or limit is None
+            keys = catalog_db.search(parsed.text, *(facets.get(f, "All") for f in _SQL_FACETS),
+                                     limit=-1 if filtered_later else limit)
+
+        def compute(cancelled: Callable[[], bool]) -> QueryOutcome:
+            # Term filters may first have to build the QueryIndex, and they re-read card text to
+            # check phrases, so they run here on the worker with the scoring
+            term_mask = engine.query_index.filter(parsed.terms) if parsed.terms else engine.facets.all_bits
+            if catalog_db:
+                accepted = engine.keys_in(term_mask, keys)
+                found = accepted if owned_mask is None else engine.keys_in(owned_mask, accepted)
+                accepted = frozenset(accepted)
+                return QueryOutcome([engine.cards[engine.positions[k]] for k in found[:limit]],
+                                    lambda card: card["card_key"] in accepted, None, engine, None)
+
+            filter_mask = engine.facets.filter(facets) & term_mask
+            mask = filter_mask if owned_mask is None else filter_mask & owned_mask
+            result = self.search(parsed.text, mask, cancelled, engine, filters)
+            threshold = CONFIG["search"]["fuzzy_threshold"]
+
+            def position(card):
+                return engine.positions.get(card["card_key"], -1)
+
+            def accepts(card):
+                i = position(card)
+                if i < 0 or not filter_mask >> i & 1:
+                    return False
+                return not parsed.text or engine.score_one(parsed.text, i) >= threshold
+
+            def rank_key(card):
+                # Same order as the matches: best score first, then catalog order
+                i = position(card)
+                return (-engine.score_one(parsed.text, i), i) if parsed.text else (i,)
+
+            return QueryOutcome([engine.cards[i] for i, _ in result.matches[:limit]],
+                                accepts, rank_key, engine, result)
+
+        return compute
+
+
+def query_filters(parsed: ParsedQuery, facets: Dict[str, str] = None, owned_mask: int = None) -> Hashable:
+    """The filters description query() records, for is_current()"""
+    return tuple(parsed.terms), tuple(sorted((facets or {}).items())), owned_mask
@@ -0,0 +1,107 @@
+from typing import *
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import queue
+
+from app.config import CONFIG
+from app.search_engine import SearchCancelled
+
+
+class SearchScheduler:
+    """Coalesces search triggers per tab into one run after a short quiet period.
+
+    Every request bumps the tab's generation; a pending or in-flight search whose
+    generation is no longer current is dropped instead of being applied.
+
+    submit() runs the scoring part of a search on a single worker thread so typing never
+    waits on a scan. The compute function gets a cancelled() callable that turns True as
+    soon as a newer request supersedes it; its result is handed back to the Tk thread
+    through a queue and applied only if its generation is still current.
+    """
+
+    def __init__(self, root, delay_ms: int = None):
+        self.root = root
+        self.delay_ms = CONFIG["search"]["debounce_ms"] if delay_ms is None else delay_ms
+        self._generations: Dict[Hashable, int] = {}
+        self._pending: Dict[Hashable, str] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+        self._results: "queue.Queue[tuple]" = queue.Queue()
+        self._in_flight = 0
+        self._running: Dict[Hashable, int] = {}
+        self._poll_id = None
+
+    def schedule(self, key: Hashable, callback: Callable[[], None]) -> int:
+        generation = self._next_generation(key)
+        self._pending[key] = self.root.after(self.delay_ms, lambda: self._fire(key, generation, callback))
+        return generation
+
+    def run_now(self, key: Hashable, callback: Callable[[], None]) -> int:
+        generation = self._next_generation(key)
+        callback()
+        return generation
+
+    def submit(self, key: Hashable, compute: Callable[[Callable[[], bool]], Any],
+               apply: Callable[[Any], None]) -> int:
+        generation = self._next_generation(key)
+        cancelled = lambda: not self.is_current(key, generation)
+        self._in_flight += 1
+        self._running[key] = self._running.get(key, 0) + 1
+        self._executor.submit(self._compute, key, generation, compute, cancelled, apply)
+        if self._poll_id is None:
+            self._poll_id = self.root.after(CONFIG["search"]["poll_ms"], self._poll)
+        return generation
+
+    def has_pending(self, key: Hashable) -> bool:
+        """Whether a search for key is still waiting to run or to be applied"""
+        return key in self._pending or self._running.get(key, 0) > 0
+
+    def shutdown(self) -> None:
+        for key in list(self._generations):
+            self.cancel(key)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def cancel(self, key: Hashable) -> None:
+        self._next_generation(key)
+
+    def is_current(self, key: Hashable, generation: int) -> bool:
+        return self._generations.get(key) == generation
+
+    def _next_generation(self, key):
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            self.root.after_cancel(pending)
+        self._generations[key] = self._generations.get(key, 0) + 1
+        return self._generations[key]
+
+    def _fire(self, key, generation, callback):
+        self._pending.pop(key, None)
+        if self.is_current(key, generation):
+            callback()
+
+    def _compute(self, key, generation, compute, cancelled, apply):
+        # Runs on the worker thread; superseded jobs still in the queue are skipped
+        outcome = None
+        try:
+            if not cancelled():
+                outcome = ("result", compute(cancelled))
+        except SearchCancelled:
+            pass
+        except Exception as e:
+            logging.error("Search failed", exc_info=True)
+            outcome = ("error", e)
+        self._results.put((key, generation, apply, outcome))
+
+    def _poll(self):
+        while True:
+            try:
+                key, generation, apply, outcome = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._in_flight -= 1
+            self._running[key] -= 1
+            if outcome and outcome[0] == "result" and self.is_current(key, generation):
+                apply(outcome[1])
+
+        self._poll_id = None
+        if self._in_flight:
+            self._poll_id = self.root.after(CONFIG["search"]["poll_ms"], self._poll)
@@ -0,0 +1,132 @@
+from typing import *
+from functools import total_ordering
+import copy
+
+# Treeview column -> card field it displays
+SORT_FIELDS = {"CardKey": "card_key", "Aspect": "Aspects", "Health": "HP"}
+MAX_SORT_COLUMNS = 3
+
+
+def typed_sort_key(value: Any) -> Tuple:
+    """Order numbers numerically, text case-insensitively and missing values last"""
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)  # collector numbers
+    if value is None:
+        return (2, 0)
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, tuple):
+        value = ", ".join(value)
+    return (1, str(value).lower())
+
+
+class SortKeyCache:
+    """Typed sort keys per column, computed once per catalog and looked up by card position.
+
+    The Owned column follows the collection and is read on every call instead; off the Tk
+    thread, pass a copy of the owned counts rather than the live dict. Searches sort on a
+    worker thread against an engine snapshot, so the cache is swapped as a whole when the
+    catalog changes.
+    """
+
+    def __init__(self, engine, collection: Dict[str, int]):
+        self.engine = engine
+        self.collection = collection
+        self._cache: Tuple[Any, Dict[str, List[Tuple]]] = (None, {})  # catalog, column -> keys
+
+    def column(self, col: str, engine=None, owned: Dict[str, int] = None) -> Callable[[Dict[str, Any]], Tuple]:
+        if col == "Owned":
+            collection = self.collection if owned is None else owned
+            return lambda card: (0, collection.get(card["card_key"], 0))
+
+        engine = engine or self.engine
+        catalog, columns = self._cache
+        if catalog is not engine.cards:
+            catalog, columns = engine.cards, {}
+            self._cache = (catalog, columns)
+        keys = columns.get(col)
+        if keys is None:
+            field = SORT_FIELDS.get(col, col)
+            keys = columns[col] = [typed_sort_key(card.get(field)) for card in catalog]
+        positions = engine.positions
+        return lambda card: keys[positions[card["card_key"]]]
+
+
+@total_ordering
+class _MultiKey:
+    # Compares column keys lexicographically, honouring each column's direction
+    __slots__ = ("parts", "reversed_columns")
+
+    def __init__(self, parts, reversed_columns):
+        self.parts = parts
+        self.reversed_columns = reversed_columns
+
+    def __eq__(self, other):
+        return self.parts == other.parts
+
+    def __lt__(self, other):
+        for mine, theirs, reverse in zip(self.parts, other.parts, self.reversed_columns):
+            if mine != theirs:
+                return (mine > theirs) if reverse else (mine < theirs)
+        return False
+
+
+class TableSort:
+    """A table's multi-column sort order, kept across searches.
+
+    Clicking a column makes it the primary key (ascending), clicking the primary column again
+    flips it to descending and a third click drops it. Earlier columns stay on as tie-breakers.
+    """
+
+    def __init__(self, keys: SortKeyCache):
+        self.keys = keys
+        self.columns: List[Tuple[str, bool]] = []  # (column, descending), primary first
+        self.owned: Optional[Dict[str, int]] = None  # owned counts fixed by snapshot()
+
+    def snapshot(self) -> "TableSort":
+        """A copy to sort with on a worker thread: its columns, and the owned counts when
+        sorting by Owned, are those at the time of the call"""
+        frozen = copy.copy(self)
+        frozen.columns = list(self.columns)
+        if self.sorts_on("Owned"):
+            frozen.owned = dict(self.keys.collection)
+        return frozen
+
+    def sorts_on(self, col: str) -> bool:
+        return any(sorted_col == col for sorted_col, _ in self.columns)
+
+    def click(self, col: str) -> None:
+        if self.columns and self.columns[0][0] == col:
+            if self.columns[0][1]:
+                self.columns.pop(0)
+            else:
+                self.columns[0] = (col, True)
+            return
+        self.columns = [(col, False)] + [c for c in self.columns if c[0] != col]
+        del self.columns[MAX_SORT_COLUMNS:]
+
+    def sort(self, rows: Iterable[Dict[str, Any]], engine=None) -> List[Dict[str, Any]]:
+        """rows in sort order; without sort columns the incoming order is kept.
+
+        engine is the snapshot rows came from, when sorting off the Tk thread.
+        """
+        rows = list(rows)
+        # Stable sorts from the least to the most significant column
+        for col, descending in reversed(list(self.columns)):
+            rows.sort(key=self.keys.column(col, engine, self.owned), reverse=descending)
+        return rows
+
+    def order_key(self) -> Optional[Callable[[Dict[str, Any]], Any]]:
+        """Key placing a single row consistently with sort(), or None when unsorted"""
+        if not self.columns:
+            return None
+        columns = [self.keys.column(col) for col, _ in self.columns]
+        directions = tuple(descending for _, descending in self.columns)
+        return lambda card: _MultiKey([column(card) for column in columns], directions)
+
+    def heading(self, col: str) -> str:
+        for rank, (sorted_col, descending) in enumerate(self.columns):
+            if sorted_col == col:
+                arrow = "▼" if descending else "▲"
+                return f"{col} {arrow}" if rank == 0 else f"{col} {arrow}{rank + 1}"
+        return col
@@ -1,12 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox
-from rapidfuzz import fuzz
-from app.config import CONFIG
 from app.validators import CardValidator
-from app.data_manager import save_collection
 from app.card_detail_window import CardDetailWindow
 from app.deck_builder_ui import DeckBuilderTab
 from app.app_interfaces import ICardApp
+from app.card_query import parse_query
+from app.config import CONFIG
+from app.image_prefetcher import art_size
+from app.search_engine import SearchSession
+from app.table_sort import SortKeyCache, TableSort
+from app.virtual_table import VirtualTable
+
 
 class UIComponents:
     def __init__(self, app: ICardApp):
@@ -14,6 +18,12 @@ class UIComponents:
         self.root = app.root
         self.cards = app.cards
         self.collection = app.collection
+        self.search_sessions = {False: SearchSession(app.search_engine), True: SearchSession(app.search_engine)}
+        self.tables = {}  # owned -> VirtualTable
+        sort_keys = SortKeyCache(app.search_engine, app.collection)
+        self.table_sorts = {False: TableSort(sort_keys), True: TableSort(sort_keys)}
+        # owned -> predicate for cards the table's current filters accept
+        self.table_filters = {False: lambda card: True, True: lambda card: True}
 
         self.setup_menu()
         self.setup_tabs()
@@ -49,7 +59,8 @@ class UIComponents:
 
     def setup_search_frame(self, parent, owned=False):
         var_prefix = "owned_" if owned else ""
-        cards = [c for c in self.cards if self.collection.get(c["card_key"], 0) > 0] if owned else self.cards
+        facets = self.app.search_engine.facets
+        owned_index = self.app.owned_index
 
         setattr(self.app, f"{var_prefix}search_var", tk.StringVar())
         setattr(self.app, f"{var_prefix}set_filter_var", tk.StringVar())
@@ -67,7 +78,7 @@ class UIComponents:
         arena_var = getattr(self.app, f"{var_prefix}arena_filter_var")
 
         tk.Entry(frame, textvariable=search_var, width=40).grid(row=1, column=0, padx=5)
-        tk.Button(frame, text="Search", command=lambda: self.search_cards(owned)).grid(row=1, column=1, padx=5)
+        tk.Button(frame, text="Search", command=lambda: self.request_search(owned, immediate=True)).grid(row=1, column=1, padx=5)
         tk.Button(frame, text="Reset Filters", command=lambda: self.reset_filters(owned)).grid(row=1, column=2, padx=5)
 
         for i, label in enumerate(["Set", "Type", "Aspect", "Arena"], start=3):
@@ -81,33 +92,29 @@ class UIComponents:
         }
 
         for i, (key, var) in enumerate(filter_data.items(), start=3):
-            values = sorted(set(
-                v for c in cards for v in (
-                    c.get(key, []) if isinstance(c.get(key), list) else c.get(key, "").split(", ")
-                ) if v
-            ))
+            values = owned_index.values(key) if owned else facets.values(key)
             cb = ttk.Combobox(frame, textvariable=var, state="readonly", width=12)
             cb["values"] = ["All"] + values
+            if owned:
+                # Owned values change with the collection; refresh them whenever the list opens
+                cb.configure(postcommand=lambda cb=cb, key=key: cb.configure(values=["All"] + owned_index.values(key)))
             cb.set("All")
             cb.grid(row=1, column=i, padx=5)
 
-        # Attach filters after widgets exist
-        search_var.trace_add("write", lambda *_: self.search_cards(owned))
-        set_var.trace_add("write", lambda *_: self.search_cards(owned))
-        type_var.trace_add("write", lambda *_: self.search_cards(owned))
-        aspect_var.trace_add("write", lambda *_: self.search_cards(owned))
-        arena_var.trace_add("write", lambda *_: self.search_cards(owned))
+        # Attach filters after widgets exist; bursts of changes coalesce into one search
+        for var in (search_var, set_var, type_var, aspect_var, arena_var):
+            var.trace_add("write", lambda *_: self.request_search(owned))
 
     def setup_table(self, parent, is_owned):
         frame = tk.Frame(parent)
         frame.pack(fill="both", expand=True, padx=10, pady=5)
 
         tree = ttk.Treeview(frame, columns=("CardKey", "Owned", "Name", "Set", "Number", "Type", "Aspect", "Arenas", "Cost", "Power", "Health"), show="headings")
-        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical")
+        self.tables[is_owned] = VirtualTable(tree, scrollbar, self._row_values)
 
         for col in tree["columns"]:
-            tree.heading(col, text=col, command=lambda c=col, t=tree: self.sort_column(t, c, False))
+            tree.heading(col, text=col, command=lambda c=col, owned=is_owned: self.sort_column(owned, c))
             tree.column(col, width=80, stretch=True)
 
         tree.pack(side="left", fill="both", expand=True)
@@ -123,69 +130,96 @@ class UIComponents:
             self.load_table(owned_only=False)
 
     def load_table(self, owned_only=False):
-        tree = self.app.owned_tree if owned_only else self.app.tree
-        tree.delete(*tree.get_children())
-        cards = [c for c in self.cards if self.collection.get(c["card_key"], 0) > 0] if owned_only else self.cards
-
-        for card in cards:
-            tree.insert("", "end", values=(
-                card["card_key"],
-                self.collection.get(card["card_key"], 0),
-                card.get("Name", "Unknown"),
-                card.get("Set", ""),
-                card.get("Number", ""),
-                card.get("Type", ""),
-                ", ".join(card.get("Aspects")) if "Aspects" in card else card.get("Aspects", ""),
-                ", ".join(card.get("Arenas")) if "Arenas" in card else card.get("Arenas", ""),
-                card.get("Cost", ""),
-                card.get("Power", ""),
-                card.get("HP", "")
-            ))
+        cards = self.app.owned_index.cards() if owned_only else self.cards
+        positions = self.app.search_engine.positions
+        sort = self.table_sorts[owned_only]
+        self.tables[owned_only].set_rows(
+            sort.sort(cards), order_key=sort.order_key() or (lambda card: positions.get(card["card_key"], -1))
+        )
+        self.table_filters[owned_only] = lambda card: True
+
+    def request_search(self, owned=False, immediate=False):
+        scheduler = self.app.search_scheduler
+        key = "owned" if owned else "all"
+        if immediate:
+            scheduler.run_now(key, lambda: self.search_cards(owned))
+        else:
+            scheduler.schedule(key, lambda: self.search_cards(owned))
 
     def search_cards(self, owned=False):
+        # Filter settings are read here on the Tk thread; masks and scoring are built in the background
         var_prefix = "owned_" if owned else ""
         query = getattr(self.app, f"{var_prefix}search_var").get().lower()
         s_set = getattr(self.app, f"{var_prefix}set_filter_var").get()
         s_type = getattr(self.app, f"{var_prefix}type_filter_var").get()
         s_aspect = getattr(self.app, f"{var_prefix}aspect_filter_var").get()
         s_arena = getattr(self.app, f"{var_prefix}arena_filter_var").get()
-        tree = self.app.owned_tree if owned else self.app.tree
-
-        data = [c for c in self.cards if self.collection.get(c["card_key"], 0) > 0] if owned else self.cards
-        filtered = []
-
-        for card in data:
-            score = fuzz.partial_ratio(query, card.get("Name", "").lower()) if query else 100
-            if score < CONFIG["search"]["fuzzy_threshold"]:
-                continue
-            if s_set != "All" and card.get("Set", "") != s_set:
-                continue
-            if s_type != "All" and card.get("Type", "") != s_type:
-                continue
-            aspects = card.get("Aspects") if "Aspects" in card else card.get("Aspects", "").split(", ")
-            if s_aspect != "All" and s_aspect not in aspects:
-                continue
-            arenas = card.get("Arenas") if "Arenas" in card else card.get("Arenas", "").split(", ")
-            if s_arena != "All" and s_arena not in arenas:
-                continue
-            filtered.append((score, card))
-
-        filtered.sort(reverse=True, key=lambda x: x[0])
-        tree.delete(*tree.get_children())
-        for _, card in filtered:
-            tree.insert("", "end", values=(
-                card["card_key"],
-                self.collection.get(card["card_key"], 0),
-                card.get("Name", "Unknown"),
-                card.get("Set", ""),
-                card.get("Number", ""),
-                card.get("Type", ""),
-                ", ".join(card.get("Aspects")) if "Aspects" in card else card.get("Aspects", ""),
-                ", ".join(card.get("Arenas")) if "Arenas" in card else card.get("Arenas", ""),
-                card.get("Cost", ""),
-                card.get("Power", ""),
-                card.get("HP", "")
-            ))
+        table = self.tables[owned]
+        sort = self.table_sorts[owned]
+        parsed = parse_query(query)
+
+        frozen_sort = sort.snapshot()  # the worker's view of the sort order and owned counts
+        session = self.search_sessions[owned]
+        search = session.query(
+            parsed, {"Set": s_set, "Type": s_type, "Aspects": s_aspect, "Arenas": s_arena},
+            self.app.owned_index.mask if owned else None, self.app.catalog_db,
+        )
+
+        def compute(cancelled):
+            outcome = search(cancelled)
+            return outcome, frozen_sort.sort(outcome.cards, outcome.engine)
+
+        def apply(computed):
+            outcome, found = computed
+            session.commit(outcome.result)
+            table.set_rows(found, order_key=sort.order_key() or outcome.rank_key)
+            # Everything passing the filters but ownership, for rows inserted when a card becomes owned
+            self.table_filters[owned] = outcome.accepts
+            self._prefetch_art(owned, found)
+
+        self.app.search_scheduler.submit("owned" if owned else "all", compute, apply)
+
+    def _prefetch_art(self, owned, rows):
+        # The top results are the ones likely to be opened next
+        self.app.image_prefetcher.warm("owned" if owned else "all", (
+            (card["card_key"], "front", art_size(card, "front", "detail"), card.get("FrontArt", ""))
+            for card in rows[:CONFIG["images"]["prefetch_results"]]
+        ))
+
+    def on_owned_changed(self, card_key, old_qty, new_qty):
+        """Patch both tables for one card's new quantity instead of searching again"""
+        card = self.app.card_index.get(card_key)
+        for owned, table in self.tables.items():
+            if self.table_sorts[owned].sorts_on("Owned") and table.index_of(card_key) is not None:
+                table.remove_row(card_key)  # the row moves with its new quantity
+                table.insert_row(card)
+            else:
+                table.update_row(card_key)
+        if (old_qty > 0) == (new_qty > 0):
+            return
+        if self.app.search_scheduler.has_pending("owned"):
+            # A search already under way was computed against the old owned set
+            self.request_search(owned=True, immediate=True)
+        elif new_qty > 0:
+            if card is not None and self.table_filters[True](card):
+                self.tables[True].insert_row(card)
+        else:
+            self.tables[True].remove_row(card_key)
+
+    def _row_values(self, card):
+        return (
+            card["card_key"],
+            self.collection.get(card["card_key"], 0),
+            card.get("Name", "Unknown"),
+            card.get("Set", ""),
+            card.get("Number", ""),
+            card.get("Type", ""),
+            ", ".join(card.get("Aspects", ())),
+            ", ".join(card.get("Arenas", ())),
+            card.get("Cost", ""),
+            card.get("Power", ""),
+            card.get("HP", "")
+        )
 
     def reset_filters(self, owned=False):
         prefix = "owned_" if owned else ""
@@ -194,7 +228,6 @@ class UIComponents:
         getattr(self.app, f"{prefix}type_filter_var").set("All")
         getattr(self.app, f"{prefix}aspect_filter_var").set("All")
         getattr(self.app, f"{prefix}arena_filter_var").set("All")
-        self.load_table(owned_only=owned)
 
     def on_double_click(self, event, tree):
         region = tree.identify_region(event.x, event.y)
@@ -223,24 +256,21 @@ class UIComponents:
                 messagebox.showerror("Validation Error", msg)
                 return
 
-            self.collection[card_key] = new_owned
-            save_collection(self.collection)
-            self.search_cards(owned=(tree == self.app.owned_tree))
+            self.app.set_owned_quantity(card_key, new_owned)
 
     def show_card_info(self, tree):
         selected_item = tree.selection()
         if selected_item:
             card_key = tree.item(selected_item)['values'][0]
-            card = next((c for c in self.cards if c["card_key"] == card_key), None)
+            card = self.app.card_index.get(card_key)
             if card:
                 CardDetailWindow(self.root, self.app, card)
 
-    def sort_column(self, tree, col, reverse):
-        data = [(tree.set(k, col), k) for k in tree.get_children("")]
-        try:
-            data.sort(key=lambda t: float(t[0]), reverse=reverse)
-        except ValueError:
-            data.sort(key=lambda t: t[0].lower(), reverse=reverse)
-        for index, (_, k) in enumerate(data):
-            tree.move(k, "", index)
-        tree.heading(col, command=lambda: self.sort_column(tree, col, not reverse))
+    def sort_column(self, owned, col):
+        sort = self.table_sorts[owned]
+        sort.click(col)
+        tree = self.app.owned_tree if owned else self.app.tree
+        for column in tree["columns"]:
+            tree.heading(column, text=sort.heading(column))
+        # The search session still holds the results, so this only re-sorts them
+        self.request_search(owned, immediate=True)
@@ -0,0 +1,78 @@
+"""Decode time and peak memory of ImageManager.get_image(size=...) against open-then-resize.
+
+Run from the repository root:
+
+    python -m benchmarks.image_decode [art files...]
+
+Without arguments it generates card-sized PNG art, which is what the card CDN serves, plus
+JPEGs for comparison. 'old' is a plain Image.open + LANCZOS; 'new' is ImageManager.get_image
+with a target size, as get_card_image calls it, followed by the same resize. Each mode runs in
+a fresh process, and its peak is the increase of that process's VmHWM (Linux only).
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+SIZE = (375, 525)
+RUNS = 30
+GENERATED = [("png", "RGBA", 745, 1040), ("png", "RGBA", 1490, 2080),
+             ("jpg", "RGB", 745, 1040), ("jpg", "RGB", 1490, 2080), ("jpg", "RGB", 2980, 4160)]
+
+
+def _peak_kib() -> int:
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+
+
+def _generate(folder: str):
+    paths = []
+    for ext, mode, width, height in GENERATED:
+        path = os.path.join(folder, f"art_{width}x{height}.{ext}")
+        # Gradient plus noise: compresses about like card art, unlike a flat fill
+        art = Image.blend(Image.radial_gradient("L").resize((width, height)),
+                          Image.effect_noise((width, height), 40), 0.3).convert(mode)
+        art.save(path, **({"quality": 92} if ext == "jpg" else {}))
+        paths.append(path)
+    return paths
+
+
+def _run(mode: str, path: str) -> None:
+    from app.card import ImageManager
+    folder, name = os.path.split(path)
+    manager = ImageManager(folder)
+    base = _peak_kib()
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        if mode == "old":
+            Image.open(path).resize(SIZE, Image.Resampling.LANCZOS)
+        else:
+            with manager.get_image(name, "", SIZE) as source:
+                source.resize(SIZE, Image.Resampling.LANCZOS)
+    elapsed = (time.perf_counter() - start) / RUNS * 1000
+    print(f"{elapsed:.1f}\t{(_peak_kib() - base) / 1024:.1f}")
+
+
+def main(paths):
+    with tempfile.TemporaryDirectory() as folder:
+        paths = paths or _generate(folder)
+        print(f"{'art':<24}{'old ms':>9}{'old MiB':>9}{'new ms':>9}{'new MiB':>9}")
+        for path in paths:
+            row = []
+            for mode in ("old", "new"):
+                out = subprocess.run([sys.executable, "-m", "benchmarks.image_decode", "--run", mode, path],
+                                     capture_output=True, text=True, check=True).stdout
+                row.extend(out.split())
+            with Image.open(path) as art:
+                label = f"{art.format} {art.width}x{art.height}"
+            print(f"{label:<24}" + "".join(f"{value:>9}" for value in row))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        _run(sys.argv[2], sys.argv[3])
+    else:
+        main(sys.argv[1:])
@@ -0,0 +1,50 @@
+"""Time of each step CardApp runs on the Tk thread when it loads the catalog.
+
+Run from the repository root, after the app has written cards.catalog once:
+
+    python -m benchmarks.startup
+
+Each step is timed RUNS times on a fresh load and the median is printed in ms. The last
+row is the first fielded query, which builds the QueryIndex; the app runs it on the search
+worker rather than at startup.
+"""
+import statistics
+import time
+
+from app.card_index import CardIndex
+from app.card_query import parse_query
+from app.card_schema import CardSchema
+from app.data_manager import load_cards
+from app.search_engine import SearchEngine
+
+RUNS = 7
+
+
+def _once():
+    times = {}
+    start = time.perf_counter()
+    cards = load_cards()
+    times["load_cards"] = time.perf_counter() - start
+
+    for name, build in (("CardIndex", CardIndex), ("CardSchema", CardSchema), ("SearchEngine", SearchEngine)):
+        start = time.perf_counter()
+        built = build(cards)
+        times[name] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    built.query_index.filter(parse_query("trait:droid").terms)
+    times["first fielded query"] = time.perf_counter() - start
+    return times
+
+
+def main():
+    runs = [_once() for _ in range(RUNS)]
+    startup = [sum(t for name, t in run.items() if name != "first fielded query") for run in runs]
+    for name in runs[0]:
+        if name == "first fielded query":
+            print(f"{'startup total':<22}{statistics.median(startup) * 1000:>8.1f}")
+        print(f"{name:<22}{statistics.median(run[name] for run in runs) * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
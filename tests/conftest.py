@@ -0,0 +1,97 @@
+from tkinter import ttk
+
+import pytest
+
+
+class FakeTreeview:
+    """Enough of ttk.Treeview for VirtualTable, without a display.
+
+    Rows are ROW_HEIGHT pixels below a HEADER_HEIGHT heading, and changing the selection fires
+    <<TreeviewSelect>> like Tk does.
+    """
+    HEADER_HEIGHT, ROW_HEIGHT = 25, 20
+
+    def __init__(self, height=225):
+        self.height = height
+        self.values = {}
+        self.order = []
+        self.selected = []
+        self.focused = ""
+        self.bindings = {}
+        self._next_id = 0
+
+    def insert(self, parent, index, values=()):
+        self._next_id += 1
+        iid = f"I{self._next_id}"
+        self.values[iid] = tuple(values)
+        self.order.append(iid)
+        return iid
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.values[iid]
+            self.order.remove(iid)
+
+    def item(self, iid, option=None, values=None):
+        if values is not None:
+            self.values[iid] = tuple(values)
+        if option == "values":
+            return self.values[iid]
+        return {"values": list(self.values[iid])}
+
+    def selection_set(self, items):
+        changed = list(items) != self.selected
+        self.selected = list(items)
+        if changed and "<<TreeviewSelect>>" in self.bindings:
+            self.bindings["<<TreeviewSelect>>"](None)
+
+    def selection(self):
+        return tuple(self.selected)
+
+    def focus(self, iid=None):
+        if iid is None:
+            return self.focused
+        self.focused = iid
+
+    def bbox(self, iid):
+        return (0, self.HEADER_HEIGHT + self.ROW_HEIGHT * self.order.index(iid), 100, self.ROW_HEIGHT)
+
+    def winfo_height(self):
+        return self.height
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def bind(self, sequence, func, add=None):
+        self.bindings[sequence] = func
+
+    def shown_keys(self):
+        return [self.values[iid][0] for iid in self.order]
+
+
+class FakeScrollbar:
+    def configure(self, command=None):
+        self.command = command
+
+    def set(self, first, last):
+        self.position = (first, last)
+
+
+class _FakeStyle:
+    def __init__(self, master=None):
+        pass
+
+    def lookup(self, style, option):
+        return ""
+
+
+@pytest.fixture
+def make_table(monkeypatch):
+    from app.virtual_table import VirtualTable
+    monkeypatch.setattr(ttk, "Style", _FakeStyle)
+
+    def make(rows, order_key=None, height=225):
+        table = VirtualTable(FakeTreeview(height), FakeScrollbar(), lambda card: (card["card_key"],))
+        table.set_rows(rows, order_key=order_key)
+        return table
+    return make
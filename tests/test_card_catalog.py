@@ -0,0 +1,57 @@
+import json
+import os
+import pickle
+
+import pytest
+
+from app.card_catalog import MAGIC, _PREFIX
+from app.config import CONFIG
+from app.data_manager import load_cards
+
+
+@pytest.fixture
+def catalog_files(tmp_path, monkeypatch):
+    cards = [
+        {"card_key": f"SOR-{n:03}-Normal", "Set": "SOR", "Number": f"{n:03}", "Name": f"Card {n}",
+         "Type": "Unit", "Cost": str(n % 7), "FrontText": "Ambush — déjà vu " * 3,
+         "FrontArt": f"https://cdn.swu-db.com/images/cards/SOR/{n:03}.png"}
+        for n in range(1, 51)
+    ]
+    cards_file = tmp_path / "cards.json"
+    cards_file.write_text(json.dumps(cards), encoding="utf-8")
+    monkeypatch.setitem(CONFIG, "data", {
+        **CONFIG["data"],
+        "cards_file": str(cards_file),
+        "cards_snapshot_file": str(tmp_path / "cards.catalog"),
+        "set_folder": str(tmp_path / "card_sets"),
+    })
+    return cards
+
+
+@pytest.mark.parametrize("cut", [1, 10, 0.5])
+def test_truncated_catalog_is_rebuilt(catalog_files, cut):
+    expected = [dict(card) for card in load_cards()]  # read before the mapped file is cut
+    snapshot_file = CONFIG["data"]["cards_snapshot_file"]
+    size = os.path.getsize(snapshot_file)
+    with open(snapshot_file, "r+b") as f:
+        f.truncate(int(size * cut) if isinstance(cut, float) else size - cut)
+
+    cards = load_cards()
+
+    assert [dict(card) for card in cards] == expected
+    assert cards[-1]["FrontArt"] == catalog_files[-1]["FrontArt"]
+    assert os.path.getsize(snapshot_file) == size
+
+
+def test_catalog_with_a_damaged_header_is_rebuilt(catalog_files):
+    expected = [dict(card) for card in load_cards()]
+    snapshot_file = CONFIG["data"]["cards_snapshot_file"]
+    with open(snapshot_file, "rb") as f:
+        _, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+        header, rest = pickle.loads(f.read(header_len)), f.read()
+    del header["hot_fields"]  # still matches the version and sources
+    header = pickle.dumps(header)
+    with open(snapshot_file, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(header)) + header + rest)
+
+    assert [dict(card) for card in load_cards()] == expected
@@ -0,0 +1,49 @@
+import pytest
+
+from app import card_query
+from app.card_query import ParsedQuery, QueryTerm, parse_query
+from app.search_engine import SearchEngine
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("luke", ParsedQuery("luke", [])),
+    ("cost<=3", ParsedQuery("", [QueryTerm("cost", "<=", "3")])),
+    ("cost>=2 luke", ParsedQuery("luke", [QueryTerm("cost", ">=", "2")])),
+    ("hp!=4", ParsedQuery("", [QueryTerm("hp", "!=", "4")])),
+    ("health<5", ParsedQuery("", [QueryTerm("hp", "<", "5")])),
+    ("-trait:droid", ParsedQuery("", [QueryTerm("trait", ":", "droid", True)])),
+    ('text:"heal 2"', ParsedQuery("", [QueryTerm("text", ":", "heal 2")])),
+    ('"deal 1 damage"', ParsedQuery("", [QueryTerm("any", ":", "deal 1 damage")])),
+    ('name:"han so', ParsedQuery("", [QueryTerm("name", ":", "han so")])),
+    ("type:unit arena:ground", ParsedQuery("", [QueryTerm("type", ":", "unit"), QueryTerm("arena", ":", "ground")])),
+    # unknown fields and comparisons on text fields stay name text
+    ("foo:bar", ParsedQuery("foo:bar", [])),
+    ("trait<x", ParsedQuery("trait<x", [])),
+    ("<3", ParsedQuery("<3", [])),
+])
+def test_parse_query(query, expected):
+    assert parse_query(query) == expected
+
+
+@pytest.mark.parametrize("query", ["cost<", "cost<=", "cost>=", "hp>=", "power!=", "trait:", "-keyword:", "text:"])
+def test_field_without_value_is_dropped_while_typing(query):
+    # Neither an empty filter nor fuzzy name text: the table shouldn't change until a value follows
+    assert parse_query(query) == ParsedQuery("", [])
+    assert parse_query(f"{query} luke") == ParsedQuery("luke", [])
+
+
+def test_operator_is_not_taken_as_the_value():
+    for op in ("<=", ">=", "!="):
+        assert all(term.value[:1] not in "<>=!" for term in parse_query(f"cost{op}").terms)
+
+
+def test_query_index_is_built_once_on_first_use(monkeypatch):
+    built = []
+    monkeypatch.setattr(card_query.QueryIndex, "rebuild", lambda self, cards, facets=None: built.append(cards))
+    cards = [{"card_key": "SOR_001", "Name": "Director Krennic", "Traits": ("Imperial", "Official")}]
+    engine = SearchEngine(cards)
+    snapshot = engine.snapshot()
+    assert built == []  # catalog load leaves it alone
+
+    assert snapshot.query_index is engine.query_index
+    assert built == [cards]
@@ -0,0 +1,32 @@
+import time
+
+import app.card_updater as card_updater
+from app.card_updater import CardDataUpdater
+
+
+def test_error_is_reported_after_sibling_sets_finish(monkeypatch):
+    started, finished = [], []
+
+    def fetch_set(self, session, set_code):
+        started.append(set_code)
+        if set_code == "bad":
+            raise ConnectionError("boom")
+        time.sleep(0.3)
+        finished.append(set_code)
+        return {"set_code": set_code}
+
+    monkeypatch.setattr(CardDataUpdater, "_fetch_set", fetch_set)
+    monkeypatch.setattr(card_updater, "load_checkpoints", lambda: {})
+    monkeypatch.setattr(card_updater, "load_set_manifest", lambda: {"sets": {}})
+
+    updater = CardDataUpdater(["sor", "shd", "bad"])
+    updater.start()
+    while True:
+        event = updater.events.get(timeout=5)
+        if event[0] == "error":
+            break
+
+    # Everything already downloading was done (and checkpointed) before the dialog can offer a
+    # retry; sets that had not started yet are cancelled
+    assert sorted(finished) == sorted(s for s in started if s != "bad")
+    assert "sor" in finished
@@ -0,0 +1,18 @@
+from app.catalog_db import CatalogDatabase
+
+
+def deck_rows(db):
+    return sorted(db.conn.execute("SELECT deck, card_key, count FROM deck_cards"))
+
+
+def test_deck_rows_follow_renames_and_deletes():
+    db = CatalogDatabase(":memory:")
+    db.replace_decks({"Aggro/Sabine": {"SOR_001": 2}, "Aggro/Boba": {"SOR_002": 1}, "AggroOld/Han": {"SOR_003": 3}})
+
+    db.rename_deck_folder("Aggro", "Fast")
+    db.rename_deck("Fast/Sabine", "Fast/Sabine Wren")
+    db.delete_deck("Fast/Boba")
+    assert deck_rows(db) == [("AggroOld/Han", "SOR_003", 3), ("Fast/Sabine Wren", "SOR_001", 2)]
+
+    db.replace_decks({"Fast/Sabine Wren": {"SOR_001": 3}})
+    assert deck_rows(db) == [("Fast/Sabine Wren", "SOR_001", 3)]
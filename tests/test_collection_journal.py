@@ -0,0 +1,59 @@
+import json
+import os
+
+import pytest
+
+import app.data_manager as data_manager
+from app.config import CONFIG
+from app.data_manager import load_collection, save_collection
+
+
+@pytest.fixture
+def collection_files(tmp_path, monkeypatch):
+    monkeypatch.setitem(CONFIG, "data", {
+        **CONFIG["data"],
+        "collection_file": str(tmp_path / "collection.json"),
+        "collection_journal_file": str(tmp_path / "collection.journal"),
+        "collection_history_file": str(tmp_path / "collection.history"),
+    })
+    monkeypatch.setitem(CONFIG, "collection", {**CONFIG["collection"], "journal_compact_bytes": 0})
+    return tmp_path
+
+
+def history(tmp_path):
+    with open(tmp_path / "collection.history", encoding="utf-8") as f:
+        return [(r["card_key"], r["qty"]) for r in map(json.loads, f)]
+
+
+def test_crashed_compaction_is_moved_into_history_once(collection_files, monkeypatch):
+    real_remove = os.remove
+
+    def crash_on_segment(path):
+        if ".journal." in os.path.basename(path):
+            raise OSError("crash before the segment was removed")
+        real_remove(path)
+
+    monkeypatch.setattr(data_manager.os, "remove", crash_on_segment)
+    with pytest.raises(OSError):
+        save_collection({"SOR_001": 2}, {"SOR_001": 2})
+    monkeypatch.setattr(data_manager.os, "remove", real_remove)
+
+    save_collection({"SOR_001": 2, "SOR_002": 1}, {"SOR_002": 1})
+
+    assert history(collection_files) == [("SOR_001", 2), ("SOR_002", 1)]
+    assert sorted(os.listdir(collection_files)) == ["collection.history", "collection.json"]
+    assert load_collection() == {"SOR_001": 2, "SOR_002": 1}
+
+
+def test_partial_history_append_is_cut_back(collection_files):
+    save_collection({"SOR_001": 2}, {"SOR_001": 2})
+    # A crash left the next segment half appended to the history
+    offset = os.path.getsize(collection_files / "collection.history")
+    record = json.dumps({"card_key": "SOR_003", "qty": 4, "timestamp": 0}) + "\n"
+    (collection_files / f"collection.journal.{offset}").write_text(record, encoding="utf-8")
+    with open(collection_files / "collection.history", "a", encoding="utf-8") as f:
+        f.write(record[:20])
+
+    save_collection({"SOR_001": 2, "SOR_003": 4, "SOR_004": 1}, {"SOR_004": 1})
+
+    assert history(collection_files) == [("SOR_001", 2), ("SOR_003", 4), ("SOR_004", 1)]
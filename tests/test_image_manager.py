@@ -0,0 +1,18 @@
+import pytest
+from PIL import Image
+
+from app.card import ImageManager
+
+
+@pytest.mark.parametrize("ext, art_size, decoded", [
+    ("png", (1490, 2080), (497, 694)),    # reduced by 3 after a full decode
+    ("jpg", (2980, 4160), (745, 1040)),   # scaled by 1/4 while decoding
+    ("png", (745, 1040), (745, 1040)),    # no whole factor fits; decoded as is
+])
+def test_get_image_decodes_no_more_than_the_size_needs(tmp_path, ext, art_size, decoded):
+    Image.new("RGB", art_size, "#446688").save(tmp_path / f"art.{ext}")
+    manager = ImageManager(str(tmp_path))
+
+    with manager.get_image(f"art.{ext}", "", (375, 525)) as image:
+        assert image.size == decoded
+        assert image.width >= 375 and image.height >= 525
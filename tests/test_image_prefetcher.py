@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from app.image_prefetcher import PRIORITY_DECK, ImagePrefetcher
+
+SIZE = (300, 420)
+
+
+class FakeRoot:
+    """root.after without a Tk main loop: callbacks run when the test pumps them"""
+
+    def __init__(self):
+        self.pending = {}
+        self._next_id = 0
+
+    def after(self, ms, callback):
+        self._next_id += 1
+        self.pending[self._next_id] = callback
+        return self._next_id
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def pump(self):
+        for after_id in list(self.pending):
+            self.pending.pop(after_id)()
+
+
+class FakeImageManager:
+    """Records each download; the first one blocks until released, so the rest stay queued"""
+
+    def __init__(self):
+        self.fetched = []
+        self.blocking = threading.Event()
+        self.release = threading.Event()
+
+    def cached_card_image(self, card_key, face, size):
+        return None
+
+    def get_card_image(self, card_key, face, size, url, session):
+        if card_key == "blocker":
+            self.blocking.set()
+            self.release.wait(5)
+        self.fetched.append(card_key)
+        return f"image of {card_key}"
+
+
+@pytest.fixture
+def prefetcher():
+    root, images = FakeRoot(), FakeImageManager()
+    prefetcher = ImagePrefetcher(root, images, max_workers=1)
+    # Occupy the only worker so later requests wait in the queue
+    prefetcher.warm("blocker", [("blocker", "front", SIZE, "url")])
+    assert images.blocking.wait(5)
+    yield prefetcher
+    images.release.set()
+    prefetcher.shutdown()
+
+
+def run_all(prefetcher):
+    prefetcher.image_manager.release.set()
+    deadline = time.monotonic() + 5
+    while prefetcher._jobs and time.monotonic() < deadline:
+        prefetcher.root.pump()
+        time.sleep(0.01)
+    return prefetcher.image_manager.fetched[1:]  # after the blocker
+
+
+def warm(prefetcher, group, card_keys, *priority):
+    prefetcher.warm(group, [(key, "front", SIZE, f"url/{key}") for key in card_keys], *priority)
+
+
+def test_requests_for_the_same_image_share_one_download(prefetcher):
+    received = []
+    warm(prefetcher, "all", ["SOR_001"])
+    prefetcher.get("SOR_001", "front", SIZE, "url/SOR_001", received.append)
+    prefetcher.get("SOR_001", "front", SIZE, "url/SOR_001", received.append)
+
+    assert run_all(prefetcher) == ["SOR_001"]
+    assert received == ["image of SOR_001"] * 2
+
+
+def test_a_shown_image_jumps_the_queue(prefetcher):
+    warm(prefetcher, "deck", ["SOR_001", "SOR_002", "SOR_003"], PRIORITY_DECK)
+    prefetcher.get("SOR_003", "front", SIZE, "url/SOR_003", lambda image: None)
+
+    assert run_all(prefetcher) == ["SOR_003", "SOR_001", "SOR_002"]
+
+
+def test_warm_replaces_the_groups_queued_requests(prefetcher):
+    warm(prefetcher, "all", ["SOR_001", "SOR_002"])
+    warm(prefetcher, "all", ["SOR_002", "SOR_003"])
+
+    assert run_all(prefetcher) == ["SOR_002", "SOR_003"]
+
+
+def test_an_image_stays_queued_while_another_group_wants_it(prefetcher):
+    warm(prefetcher, "deck", ["SOR_001", "SOR_002"], PRIORITY_DECK)
+    warm(prefetcher, "all", ["SOR_001"])
+    warm(prefetcher, "deck", [], PRIORITY_DECK)
+
+    assert run_all(prefetcher) == ["SOR_001"]
+
+
+def test_get_shows_a_blank_card_until_the_image_arrives(prefetcher):
+    received = []
+    shown = prefetcher.get("SOR_001", "front", SIZE, "url/SOR_001", received.append)
+
+    assert shown.size == SIZE
+    run_all(prefetcher)
+    assert received == ["image of SOR_001"]
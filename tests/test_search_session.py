@@ -0,0 +1,91 @@
+import json
+import random
+import string
+from pathlib import Path
+
+import pytest
+from rapidfuzz import fuzz, process
+
+from app.card_query import parse_query
+from app.config import CONFIG
+from app.search_engine import SearchEngine, SearchSession
+
+CARDS_FILE = Path(__file__).resolve().parent.parent / "cards.json"
+
+
+@pytest.fixture(scope="module")
+def engine():
+    with open(CARDS_FILE, encoding="utf-8") as f:
+        cards = [{"card_key": card["card_key"], "Name": card.get("Name", ""), "Type": card.get("Type", "")}
+                 for card in json.load(f)]
+    return SearchEngine(cards)
+
+
+def full_scan(engine, query, mask=None):
+    """Reference result: every name scored by rapidfuzz directly, no refinement"""
+    threshold = CONFIG["search"]["fuzzy_threshold"]
+    indices = range(len(engine.names)) if mask is None else [i for i in range(len(engine.names)) if mask >> i & 1]
+    names = {i: engine.names[i] for i in indices}
+    if not query:
+        return [(i, 100) for i in names]
+    scored = process.extract(query.lower(), names, scorer=fuzz.partial_ratio, score_cutoff=threshold, limit=None)
+    return sorted(((i, score) for _, score, i in scored), key=lambda m: (-m[1], m[0]))
+
+
+def typing_sequence(rng, target):
+    # Typed out character by character, with the odd typo and backspace
+    query, sequence = "", []
+    for ch in target[:rng.randint(3, len(target))]:
+        if rng.random() < 0.1:
+            sequence.append(query + rng.choice(string.ascii_lowercase))
+        query += ch
+        sequence.append(query)
+        if rng.random() < 0.1:
+            sequence.append(query[:-1])
+    return sequence
+
+
+def test_refined_results_match_a_full_scan(engine):
+    rng = random.Random(11)
+    type_mask = engine.facets.filter({"Type": "Unit"})
+    for trial in range(300):
+        session = SearchSession(engine)
+        mask = type_mask if trial % 3 == 0 else None
+        for query in typing_sequence(rng, rng.choice(engine.names)):
+            result = session.search(query, mask)
+            session.commit(result)
+            assert result.matches == full_scan(engine, query, mask), query
+
+
+def test_random_text_matches_a_full_scan(engine):
+    rng = random.Random(12)
+    for _ in range(100):
+        session = SearchSession(engine)
+        text = "".join(rng.choice(string.ascii_lowercase + " ") for _ in range(8))
+        for n in range(1, len(text) + 1):
+            result = session.search(text[:n])
+            session.commit(result)
+            assert result.matches == full_scan(engine, text[:n]), text[:n]
+
+
+def test_search_leaves_the_session_until_commit(engine):
+    session = SearchSession(engine)
+    result = session.search("luke", filters=("luke-filters",))
+    assert session.result is None and not session.is_current("luke", ("luke-filters",))
+    session.commit(result)
+    assert session.is_current("LUKE", ("luke-filters",))
+    assert not session.is_current("luke", ("other",))
+    assert not session.is_current("luk", ("luke-filters",))
+
+
+def test_query_applies_the_owned_mask_but_accepts_ignores_it(engine):
+    session = SearchSession(engine)
+    units = engine.facets.filter({"Type": "Unit"})
+    owned = units & int("10" * len(engine.names), 2)
+    outcome = session.query(parse_query("vader"), {"Type": "Unit"}, owned)(lambda: False)
+
+    assert [engine.positions[c["card_key"]] for c in outcome.cards] == [i for i, _ in full_scan(engine, "vader", owned)]
+    unowned = [i for i, _ in full_scan(engine, "vader", units) if not owned >> i & 1]
+    assert unowned and all(outcome.accepts(engine.cards[i]) for i in unowned)
+    session.commit(outcome.result)
+    assert session.is_current("vader", outcome.result.filters)
@@ -0,0 +1,19 @@
+from app.search_engine import SearchEngine
+from app.table_sort import SortKeyCache, TableSort
+
+CARDS = [{"card_key": f"SOR_{n:03}", "Name": name} for n, name in enumerate(["Luke", "Leia", "Han", "Chewbacca"])]
+
+
+def test_snapshot_sorts_on_the_owned_counts_it_was_taken_with():
+    collection = {"SOR_000": 1, "SOR_001": 3, "SOR_002": 2}
+    sort = TableSort(SortKeyCache(SearchEngine(CARDS), collection))
+    sort.click("Owned")
+    frozen = sort.snapshot()
+
+    # Edits made on the Tk thread while the worker sorts
+    collection["SOR_003"] = 5
+    collection["SOR_001"] = 0
+    sort.click("Name")
+
+    assert [card["Name"] for card in frozen.sort(CARDS)] == ["Chewbacca", "Luke", "Han", "Leia"]
+    assert [card["Name"] for card in sort.sort(CARDS)] == ["Chewbacca", "Han", "Leia", "Luke"]
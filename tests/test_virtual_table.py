@@ -0,0 +1,85 @@
+import random
+
+
+def _rows(n, prefix="K"):
+    return [{"card_key": f"{prefix}{i}", "v": i} for i in range(n)]
+
+
+def test_only_visible_rows_are_in_the_tree(make_table):
+    table = make_table(_rows(3000))
+    assert table.tree.shown_keys() == [f"K{i}" for i in range(11)]
+    table.yview("moveto", 0.5)
+    assert table.tree.shown_keys()[0] == "K1500"
+
+
+def test_positions_follow_random_inserts_and_removes(make_table):
+    rng = random.Random(1)
+    key = lambda card: (card["v"],)
+    rows = [{"card_key": f"K{i}", "v": rng.randint(0, 50)} for i in range(3000)]
+    table = make_table(sorted(rows, key=key), order_key=key)
+    pool = [{"card_key": f"N{i}", "v": rng.randint(0, 50)} for i in range(1000)]
+
+    for step in range(2000):
+        if rng.random() < 0.5 and pool:
+            table.insert_row(pool.pop())
+        else:
+            table.remove_row(rng.choice(table.rows)["card_key"])
+        if step % 100 == 0:
+            assert all(table.index_of(card["card_key"]) == i for i, card in enumerate(table.rows))
+
+    assert all(table.index_of(card["card_key"]) == i for i, card in enumerate(table.rows))
+    assert table.index_of("missing") is None
+    assert [key(card) for card in table.rows] == sorted(key(card) for card in table.rows)
+
+
+def _select(table, card_key):
+    iid = table._items[card_key]
+    table.tree.focus(iid)
+    table.tree.selection_set([iid])
+
+
+def test_selection_survives_scrolling_out_of_view(make_table):
+    table = make_table(_rows(3000))
+    _select(table, "K5")
+    assert table.selected_key == "K5"
+
+    # The selected card scrolls away; its slot now shows another card
+    table._scroll_wheel(100)
+    assert "K5" not in table.tree.shown_keys()
+    assert table.tree.selection() == () and table.tree.focus() == ""
+    assert table.selected_key == "K5"
+
+    # Arrow keys continue from the selected card, not from whatever the old slot shows now
+    table._step(1)
+    assert table.selected_key == "K6"
+    assert "K6" in table.tree.shown_keys()
+    assert table.tree.values[table.tree.selection()[0]][0] == "K6"
+
+
+def test_step_without_selection_starts_at_the_top_row(make_table):
+    table = make_table(_rows(100))
+    table._scroll_wheel(40)
+    table._step(1)
+    assert table.selected_key == "K40"
+
+
+def test_selection_comes_back_when_its_card_scrolls_into_view(make_table):
+    table = make_table(_rows(3000))
+    _select(table, "K5")
+    table._scroll_wheel(100)
+    table._scroll_wheel(-100)
+
+    assert table.tree.values[table.tree.selection()[0]][0] == "K5"
+    assert table.tree.values[table.tree.focus()][0] == "K5"
+
+
+def test_selection_stays_on_its_card_when_rows_are_inserted_above(make_table):
+    key = lambda card: (card["v"],)
+    table = make_table(_rows(3000), order_key=key)
+    _select(table, "K5")
+
+    table.insert_row({"card_key": "N1", "v": 1})
+    table.remove_row("K2")
+
+    assert table.tree.values[table.tree.selection()[0]][0] == "K5"
+    assert table.tree.shown_keys()[:6] == ["K0", "K1", "N1", "K3", "K4", "K5"]